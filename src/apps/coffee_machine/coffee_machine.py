@@ -11,14 +11,40 @@ Key functionalities covered by this class include:
   payment processing, and transaction logging.
 """
 
+from typing import List
+
 from apps.database.database_manager import DatabaseManager
 from apps.managers.menu_manager import MenuManager
 from apps.managers.order_manager import OrderManager
 from apps.managers.payment_manager import PaymentManager
 from apps.managers.online_order_manager import OnlineOrderManager
 from apps.managers.admin_manager import AdminManager
-from apps.data_classes import SalesRecord, CoffeeData
-from apps.utils.input_utils import input_with_timeout
+from apps.data_classes import SalesRecord, CoffeeData, OrderItem
+from apps.utils.input_utils import input_with_timeout, InputTimeout
+
+# Template for the additive composition logged with each sale
+_COMPOSITION_FMT = "Gula ({}), Susu ({}), Krimer ({}), Cokelat ({})"
+
+# Menus displayed on every loop iteration, ending with their input prompt so
+# each iteration writes the whole menu in the single input() call
+_MAIN_MENU = (
+    "======= Pilihan Menu =======\n"
+    "1. Mulai Pemesanan\n"
+    "2. Scan QR\n"
+    "3. Menu Admin\n"
+    "============================\n"
+    "Pilih opsi (1, 2, 3): "
+)
+_ADMIN_MENU = (
+    "\n======= Submenu Admin =======\n"
+    "1. Restock Kopi\n"
+    "2. Restock Bahan Tambahan\n"
+    "3. Ganti Kode Admin\n"
+    "4. Matikan Program\n"
+    "5. Kembali ke Menu Utama\n"
+    "==============================\n"
+    "Pilih opsi admin (1, 2, 3, 4, 5): "
+)
 
 class CoffeeMachine:
     """
@@ -33,10 +59,13 @@ class CoffeeMachine:
         coffee_list (Dict[str, CoffeeData]): Local cache for coffee inventory data.
         additives_list (Dict[str, int]): Local cache for additive inventory data.
         menu_manager (MenuManager): Manages the display of the coffee menu.
+        menu_dirty (bool): Whether the menu must be refreshed before it is shown again.
         order_manager (OrderManager): Manages the ordering logic.
         scan_qr_manager (OnlineOrderManager): Manages orders from QR code scans.
         admin_manager (AdminManager): Manages administrative functions.
         payment_manager (PaymentManager): Manages the payment process.
+        main_menu_handlers (Dict[str, Callable[[], None]]): Handlers for the main menu choices.
+        admin_menu_handlers (Dict[str, Callable[[], None]]): Handlers for the admin submenu choices.
     """
 
     def __init__(self, db_manager: DatabaseManager):
@@ -57,6 +86,7 @@ class CoffeeMachine:
         # Initialize all managers with the relevant data
         self.menu_manager = MenuManager(self.coffee_list, bestseller)
         self.menu_manager.set_coffee_numbers()
+        self.menu_dirty = False
 
         self.order_manager = OrderManager(
             self.db_manager, self.coffee_list, self.menu_manager, self.additives_list
@@ -67,30 +97,68 @@ class CoffeeMachine:
         self.admin_manager = AdminManager(self.db_manager)
         self.payment_manager = PaymentManager(self.db_manager)
 
+        # Map menu choices to their handlers once all managers exist
+        self.main_menu_handlers = {
+            "1": self.start_order,
+            "2": self.scan_qr,
+            "3": self.admin_menu,
+        }
+        self.admin_menu_handlers = {
+            "1": self.admin_manager.restock_coffee,
+            "2": self.admin_manager.restock_additives,
+            "3": self.admin_manager.change_admin_code,
+            "4": self.admin_manager.shutdown_program,
+        }
+
+    def refresh_menu(self) -> None:
+        """
+        Refreshes the existing menu with the current bestseller and coffee numbers.
+
+        The menu is updated in place instead of being rebuilt, so every manager
+        sharing it sees the changes as well. The coffees are only numbered again
+        if one of them ran out or came back in stock; otherwise only the menu
+        text is rendered again with the new stock levels.
+        """
+        self.menu_manager.set_bestselling_coffee(
+            self.db_manager.get_bestselling_coffee()
+        )
+        if self.menu_manager.numbering_is_current():
+            self.menu_manager.invalidate_menu()
+        else:
+            self.menu_manager.set_coffee_numbers()
+        self.menu_dirty = False
+
     def simulation(self) -> None:
         """
         Runs the main simulation loop of the coffee machine.
 
         Displays the main menu to the user (Order, Scan QR, Admin)
         and handles user input continuously until the program is terminated.
+        A flow that times out waiting for input returns here to the main menu.
         """
         print("\n=== Selamat datang di Mesin Kopi Virtual! ===\n")
         while True:
-            print("======= Pilihan Menu =======")
-            print("1. Mulai Pemesanan")
-            print("2. Scan QR")
-            print("3. Menu Admin")
-            print("============================")
-            choice = input("Pilih opsi (1, 2, 3): ")
-            if choice == "1":
-                self.start_order()
-            elif choice == "2":
-                self.scan_qr_manager.scan_qr()
-            elif choice == "3":
-                self.admin_menu()
+            if self.menu_dirty:
+                self.refresh_menu()
+            choice = input(_MAIN_MENU)
+            handler = self.main_menu_handlers.get(choice)
+            if handler:
+                try:
+                    handler()
+                except InputTimeout:
+                    # Stock or the bestseller may have changed before the timeout
+                    self.menu_dirty = True
             else:
                 print("⚠ - Pilihan tidak valid. Silakan pilih 1, 2, atau 3.")
 
+    def scan_qr(self) -> None:
+        """
+        Processes the online orders of a scanned QR code, marking the menu to be
+        refreshed only if their stock was taken.
+        """
+        if self.scan_qr_manager.scan_qr():
+            self.menu_dirty = True
+
     def admin_menu(self) -> None:
         """
         Displays and manages the administrative menu.
@@ -104,41 +172,65 @@ class CoffeeMachine:
             return
 
         while True:
-            print("\n======= Submenu Admin =======")
-            print("1. Restock Kopi")
-            print("2. Restock Bahan Tambahan")
-            print("3. Ganti Kode Admin")
-            print("4. Matikan Program")
-            print("5. Kembali ke Menu Utama")
-            print("==============================")
-            choice = input_with_timeout(
-                self.db_manager, "Pilih opsi admin (1, 2, 3, 4, 5): "
-            )
-            if choice == "1":
-                self.admin_manager.restock_coffee()
-            elif choice == "2":
-                self.admin_manager.restock_additives()
-            elif choice == "3":
-                self.admin_manager.change_admin_code()
-            elif choice == "4":
-                self.admin_manager.shutdown_program()
+            choice = input_with_timeout(_ADMIN_MENU)
+            handler = self.admin_menu_handlers.get(choice)
+            if handler:
+                handler()
             elif choice == "5":
                 print("\n🔃 - Kembali ke menu utama.\n")
+                # Restocking may have made coffees available again
+                self.menu_dirty = True
                 break
             else:
                 print("⚠ - Pilihan tidak valid. Silakan pilih 1, 2, 3, 4, atau 5.")
 
+    def prepare_sales_records(self, order: List[OrderItem]) -> List[SalesRecord]:
+        """
+        Builds the sales records of an order ahead of its payment.
+
+        The payment method is filled in once the payment succeeds.
+
+        Args:
+            order (List[OrderItem]): The list of order items.
+
+        Returns:
+            List[SalesRecord]: One sales record per order item.
+        """
+        sales_records = []
+        for item in order:
+            coffee = item.coffee
+            composition = item.composition
+            quantity = item.quantity
+
+            sales_records.append(
+                SalesRecord(
+                    coffee_type=coffee.name,
+                    temperature=item.temperature,
+                    composition=_COMPOSITION_FMT.format(
+                        composition.sugar,
+                        composition.milk,
+                        composition.creamer,
+                        composition.chocolate,
+                    ),
+                    quantity=f"x{quantity}",
+                    total_price=coffee.price * quantity,
+                    payment_method="",
+                )
+            )
+        return sales_records
+
     def start_order(self) -> None:
         """
         Manages the entire coffee ordering flow for the user.
 
         This process includes:
         1. Ensuring that coffee is available.
-        2. Guiding the user through selecting coffee, temperature, and composition.
-        3. Validating the availability of coffee stock and additives.
-        4. Processing the payment after the order is confirmed.
-        5. Enqueuing stock updates and sales logging if the payment is successful.
-        6. Updating the local data cache to maintain consistency.
+        2. Guiding the user through selecting coffee, temperature, and composition,
+           reserving the coffee and additive stock of each selected item.
+        3. Processing the payment after the order is confirmed.
+        4. Enqueuing sales logging if the payment is successful, or releasing
+           the reserved stock otherwise.
+        5. Marking the menu to be refreshed with the new stock and bestseller.
         """
         if not self.coffee_list:
             print("\n💔 - Mohon maaf, tidak ada kopi yang tersedia saat ini.\n")
@@ -146,72 +238,33 @@ class CoffeeMachine:
         
         order = self.order_manager.select_coffee()
         if order:
-            # Perform a final stock check to ensure there are no conflicts
-            stock_sufficient = True
-            for item in order:
-                if item.coffee.stock < item.quantity:
-                    print(
-                        f"☕ - Stok {item.coffee.name} tidak cukup. Tersisa {item.coffee.stock}."
-                    )
-                    stock_sufficient = False
-                    break
-                if not self.order_manager.check_additive_stock(
-                    item.composition, item.quantity
-                ):
-                    stock_sufficient = False
-                    break
-
-            if not stock_sufficient:
-                print("🔃 - Silakan ulangi pemesanan.\n")
-                return
-
             total_price = self.order_manager.summarize_order(order)
-            payment_successful, method = self.payment_manager.process_payment(
-                total_price
-            )
+
+            # Prepare the sales records while the stock is reserved, so only
+            # the commit is left once the payment succeeds
+            sales_records = self.prepare_sales_records(order)
+            try:
+                payment_successful, method = self.payment_manager.process_payment(
+                    total_price
+                )
+            except InputTimeout:
+                # Return the stock reserved for the abandoned order
+                self.order_manager.release_order(order)
+                raise
 
             if payment_successful:
                 print("☕ - Terima kasih! Silakan ambil kopi Anda.\n")
-                # Process after successful payment
-                for item in order:
-                    # 1. Log the sale
-                    sales_record = SalesRecord(
-                        coffee_type=item.coffee.name,
-                        temperature=item.temperature,
-                        composition=f"Gula ({item.composition.sugar}), "
-                        f"Susu ({item.composition.milk}), "
-                        f"Krimer ({item.composition.creamer}), "
-                        f"Cokelat ({item.composition.chocolate})",
-                        quantity=f"x{item.quantity}",
-                        total_price=item.coffee.price * item.quantity,
-                        payment_method=method,
-                    )
-                    self.db_manager.enqueue_log_sale(sales_record)
-
-                    # 2. Decrease coffee stock
-                    self.db_manager.enqueue_update_stock(item.coffee.name, item.quantity)
-
-                    # 3. Decrease additive stock
-                    self.db_manager.enqueue_update_additive(
-                        "Gula", -(item.composition.sugar * item.quantity)
-                    )
-                    self.db_manager.enqueue_update_additive(
-                        "Krimer", -(item.composition.creamer * item.quantity)
-                    )
-                    self.db_manager.enqueue_update_additive(
-                        "Susu", -(item.composition.milk * item.quantity)
-                    )
-                    self.db_manager.enqueue_update_additive(
-                        "Cokelat", -(item.composition.chocolate * item.quantity)
-                    )
-
-                # Update local cache to reflect changes
-                self.coffee_list = self.db_manager.coffee_list
-                self.additives_list = self.db_manager.additives_list
-                bestseller = self.db_manager.get_bestselling_coffee()
-                self.menu_manager = MenuManager(self.coffee_list, bestseller)
-                self.menu_manager.set_coffee_numbers()
+                # Commit the prepared records; the stock was already reserved,
+                # so only the sales logging is handed to the synchronization thread
+                for sales_record in sales_records:
+                    sales_record.payment_method = method
+                self.db_manager.enqueue_log_sales(sales_records)
+
+                # The menu is refreshed lazily, before it is shown again
+                self.menu_dirty = True
             else:
+                # Return the stock reserved for the unpaid order
+                self.order_manager.release_order(order)
                 if method is None:
                     print("💰 - Pembayaran dibatalkan.\n")
                 else:
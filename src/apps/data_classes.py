@@ -15,7 +15,7 @@ The data classes defined here include:
 from dataclasses import dataclass
 from typing import Dict
 
-@dataclass
+@dataclass(slots=True)
 class CoffeeData:
     """
     Represents coffee data, including basic attributes and metadata
@@ -27,18 +27,21 @@ class CoffeeData:
         stock (int): The available stock quantity.
         row_number (int): The row number in Google Sheets for easy updates.
         number (int): The dynamic sequence number displayed on the menu.
+        stock_range (str): The A1 range of the stock cell in Google Sheets.
     """
     name: str
     price: int
     stock: int
     row_number: int
     number: int = 0
+    stock_range: str = ""
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CompositionData:
     """
     Represents the composition of additives in a single serving of coffee.
     Each attribute stores the amount of the additive selected by the user.
+    Compositions are immutable and hashable, so they can be used as dictionary keys.
 
     Attributes:
         sugar (int): The amount of sugar.
@@ -51,7 +54,7 @@ class CompositionData:
     milk: int
     chocolate: int
 
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     """
     Represents a specific item in a user's order.
@@ -68,7 +71,7 @@ class OrderItem:
     temperature: str
     composition: CompositionData
 
-@dataclass
+@dataclass(slots=True)
 class QRCodeData:
     """
     Represents data related to a QR payment reference (QRIS).
@@ -80,7 +83,8 @@ class QRCodeData:
         payment_method (str): The payment method used (e.g., 'QRIS').
         timestamp (str): The time the transaction was created.
         status (str): The last status of the transaction ('Pending', 'Selesai', 'Expired').
-        row_number (int): The row number in Google Sheets for status updates.
+        row_number (int): The row number in Google Sheets for status updates, 0 until the row is appended.
+        status_range (str): The A1 range of the status cell in Google Sheets, empty until the row is appended.
     """
     ref_id: str
     total_price: int
@@ -88,8 +92,9 @@ class QRCodeData:
     timestamp: str
     status: str
     row_number: int = 0
+    status_range: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class SalesRecord:
     """
     Represents the complete data of a single sales transaction to be
@@ -100,7 +105,7 @@ class SalesRecord:
         temperature (str): The temperature of the coffee.
         composition (str): A description of the additive composition.
         quantity (str): The quantity sold (formatted as a string, e.g., 'x1').
-        total_price (int): The total price for this item.
+        total_price (int): The total price for this item (unit price multiplied by quantity).
         payment_method (str): The payment method used.
     """
     coffee_type: str
@@ -119,17 +124,11 @@ class SalesRecord:
         Returns:
             Dict[str, any]: A dictionary representing the sales data.
         """
-        # Recalculate the total price based on the quantity
-        try:
-            quantity_int = int(self.quantity.replace('x', ''))
-        except ValueError:
-            quantity_int = 1 # Default if the quantity format is invalid
-
         return {
             "jenis_kopi": self.coffee_type,
             "suhu": self.temperature,
             "komposisi": self.composition,
             "jumlah": self.quantity,
-            "total_harga": self.total_price * quantity_int,
+            "total_harga": self.total_price,
             "metode_pembayaran": self.payment_method
         }
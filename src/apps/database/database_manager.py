@@ -10,22 +10,56 @@ Key functionalities of `DatabaseManager` include:
   and sales logging) asynchronously.
 - Running a periodic synchronization thread to push updates from the queue
   to Google Sheets, ensuring data consistency.
-- Managing synchronous operations (e.g., restocking) that require immediate updates.
+- Applying restocks to the cache immediately and waking the synchronization thread.
 - Handling the storage and retrieval of the admin code.
 """
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
+from collections import Counter
+import dataclasses
 
 import threading
-import time
 import queue
-import os
+import re
 
 import gspread
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
 
 from apps.data_classes import CoffeeData, QRCodeData, SalesRecord
-from credentials.config import Configuration
+from credentials.config import Configuration, CREDENTIALS_DIR
+
+# Admin code file, resolved once so it does not depend on the working directory
+_ADMIN_CODE_FILE = CREDENTIALS_DIR / "admin_code.txt"
+
+# Matches a whole quantity stored in the 'x{number}' format, capturing the number
+_QTY_RE = re.compile(r"\s*x?\s*([+-]?\d+)\s*")
+
+# Authorized Google Sheets client shared by every DatabaseManager instance
+_client: Optional[gspread.Client] = None
+
+def get_client() -> gspread.Client:
+    """
+    Returns the shared Google Sheets client, creating it on first use.
+
+    The client runs on a single authorized session with a pooled HTTPS adapter,
+    so every API call reuses the same TCP/TLS connections instead of opening new ones.
+
+    Returns:
+        gspread.Client: The authorized Google Sheets client.
+    """
+    global _client
+    if _client is None:
+        credentials = Credentials.from_service_account_file(
+            Configuration.SERVICE_ACCOUNT_FILE,
+            scopes=["https://www.googleapis.com/auth/spreadsheets"],
+        )
+        session = AuthorizedSession(credentials)
+        session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        _client = gspread.Client(auth=credentials, session=session)
+    return _client
 
 class DatabaseManager:
     """
@@ -35,16 +69,26 @@ class DatabaseManager:
     and API calls. All write operations are queued and processed in batches.
 
     Attributes:
+        spreadsheet (gspread.Spreadsheet): The spreadsheet holding all worksheets.
         coffee_stock_ws (gspread.Worksheet): Worksheet for coffee stock.
         additives_ws (gspread.Worksheet): Worksheet for additive stock.
         qr_code_ws (gspread.Worksheet): Worksheet for QR payment data.
         sales_ws (gspread.Worksheet): Worksheet for sales history.
         online_orders_ws (gspread.Worksheet): Worksheet for QR order queue.
         lock (threading.Lock): Lock for thread-safe access to the cache.
+        stop_event (threading.Event): Set when the synchronization thread must stop.
         update_queue (queue.Queue): Queue for asynchronous write operations.
+        pending_operations (List[tuple]): Coalesced operations taken from the queue that
+                                          have not been applied yet, retried every round.
+        operation_handlers (Dict[str, Callable[..., None]]): Handlers for each queued operation type.
         coffee_list (Dict[str, CoffeeData]): Cache for coffee data.
         additives_list (Dict[str, int]): Cache for additive data.
+        additive_ranges (Dict[str, str]): A1 range of each additive's stock cell in Google Sheets.
         qr_code_list (List[QRCodeData]): Cache for QR reference data.
+        qr_code_index (Dict[str, QRCodeData]): QR reference data indexed by reference ID.
+        qr_events (Dict[str, threading.Event]): Events set when a pending QR payment gets its final status.
+        synced_values (Dict[str, Any]): Last value written to each synchronized cell in Google Sheets.
+        sales_counter (Counter): Total quantity sold per coffee, kept up to date as sales are logged.
         admin_code (int): Admin code loaded from a file.
     """
 
@@ -56,52 +100,60 @@ class DatabaseManager:
         - Loads initial data into the local cache.
         - Starts a thread for periodic synchronization.
         """
-        # Set up credentials and authorize with Google Sheets
-        credentials = Credentials.from_service_account_file(
-            Configuration.SERVICE_ACCOUNT_FILE,
-            scopes=["https://www.googleapis.com/auth/spreadsheets"],
-        )
-        client = gspread.authorize(credentials)
-        spreadsheet = client.open_by_key(Configuration.SHEET_ID)
+        # Connect to Google Sheets through the shared, connection-pooled client
+        self.spreadsheet = get_client().open_by_key(Configuration.SHEET_ID)
 
-        # Initialize worksheets to be used
-        self.coffee_stock_ws = spreadsheet.worksheet("PersediaanKopi")
-        self.additives_ws = spreadsheet.worksheet("PersediaanTambahan")
-        self.qr_code_ws = spreadsheet.worksheet("ReferenceID")
-        self.sales_ws = spreadsheet.worksheet("DataPenjualan")
-        self.online_orders_ws = spreadsheet.worksheet("AntrianPesananQR")
+        # Initialize worksheets to be used, fetching their metadata in a single request
+        worksheets = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+        self.coffee_stock_ws = worksheets["PersediaanKopi"]
+        self.additives_ws = worksheets["PersediaanTambahan"]
+        self.qr_code_ws = worksheets["ReferenceID"]
+        self.sales_ws = worksheets["DataPenjualan"]
+        self.online_orders_ws = worksheets["AntrianPesananQR"]
 
         # Initialize lock, queue, and local data cache
         self.lock = threading.Lock()
         self.update_queue = queue.Queue()
+        self.pending_operations = []
+
+        # Map queued operation types to the methods that apply them
+        self.operation_handlers = {
+            "update_qr_status": self.update_qr_status,
+            "log_sales": self.log_sales,
+            "append_qr_codes": self.append_qr_codes,
+        }
+
+        # Load initial data from Google Sheets into cache with a single request,
+        # the sales history included. The caches are built before the synchronization
+        # thread starts, so no other thread can see them yet and the loaders do not
+        # take the lock.
+        coffee_values, additive_values, qr_values, sales_values = self.fetch_values(
+            [self.coffee_stock_ws, self.additives_ws, self.qr_code_ws, self.sales_ws]
+        )
+        self.coffee_list = self.load_coffee_data(self.records_from_values(coffee_values))
+        self.additives_list = self.load_additive_data(
+            self.records_from_values(additive_values)
+        )
+        self.qr_code_list = self.load_qr_code_list(self.records_from_values(qr_values))
+        self.qr_code_index = {qr.ref_id: qr for qr in self.qr_code_list}
+        self.qr_events = {}
 
-        # Load initial data from Google Sheets into cache
-        self.coffee_list = self.load_coffee_data()
-        self.additives_list = self.load_additive_data()
-        self.qr_code_list = self.load_qr_code_list()
+        # The loaded values are what Google Sheets holds, so nothing needs syncing yet
+        self.synced_values = self.cached_cells()
+
+        # Tally the sales history once; it is kept up to date as sales are logged
+        self.sales_counter = self.get_sales_counts(sales_values)
 
         # Load admin code from a local file
         self.admin_code = self.load_admin_code()
 
         # Start the periodic synchronization thread in the background
+        self.stop_event = threading.Event()
         self.sync_thread = threading.Thread(
             target=self.periodic_sync, daemon=True
         )
         self.sync_thread.start()
 
-    def get_column_indices(self, worksheet: gspread.Worksheet) -> Dict[str, int]:
-        """
-        Gets the mapping of column names to column indices (1-based) from a worksheet.
-
-        Args:
-            worksheet (gspread.Worksheet): The worksheet to read the header from.
-
-        Returns:
-            Dict[str, int]: A dictionary mapping column names to their index numbers.
-        """
-        header = worksheet.row_values(1)
-        return {name: idx + 1 for idx, name in enumerate(header)}
-
     def load_admin_code(self) -> int:
         """
         Loads the admin code from the `admin_code.txt` file.
@@ -110,19 +162,15 @@ class DatabaseManager:
         Returns:
             int: The admin code to be used.
         """
-        admin_file = os.path.join(os.getcwd(), "credentials", "admin_code.txt")
-        if os.path.exists(admin_file):
-            with open(admin_file, "r") as f:
-                code = f.read().strip()
-                try:
-                    return int(code)
-                except ValueError:
-                    # If the file is corrupted or its content is invalid, use the default code
-                    return Configuration.DEFAULT_ADMIN_CODE
+        if _ADMIN_CODE_FILE.exists():
+            try:
+                return int(_ADMIN_CODE_FILE.read_text().strip())
+            except ValueError:
+                # If the file is corrupted or its content is invalid, use the default code
+                return Configuration.DEFAULT_ADMIN_CODE
         else:
             # If the file does not exist, create it with the default code
-            with open(admin_file, "w") as f:
-                f.write(str(Configuration.DEFAULT_ADMIN_CODE))
+            _ADMIN_CODE_FILE.write_text(str(Configuration.DEFAULT_ADMIN_CODE))
             return Configuration.DEFAULT_ADMIN_CODE
 
     def save_admin_code(self, new_code: int) -> None:
@@ -132,230 +180,502 @@ class DatabaseManager:
         Args:
             new_code (int): The new admin code to be saved.
         """
-        admin_file = os.path.join(os.getcwd(), "credentials", "admin_code.txt")
-        with open(admin_file, "w") as f:
-            f.write(str(new_code))
+        _ADMIN_CODE_FILE.write_text(str(new_code))
         self.admin_code = new_code
 
-    def load_coffee_data(self) -> Dict[str, CoffeeData]:
+    def fetch_values(
+        self, worksheets: List[gspread.Worksheet]
+    ) -> List[List[List[Any]]]:
+        """
+        Downloads the values of several worksheets with a single `values_batch_get` request.
+
+        Args:
+            worksheets (List[gspread.Worksheet]): The worksheets to download.
+
+        Returns:
+            List[List[List[Any]]]: The value rows of each worksheet, in the same order.
+        """
+        response = self.spreadsheet.values_batch_get(
+            [f"'{ws.title}'" for ws in worksheets],
+            params={"valueRenderOption": "UNFORMATTED_VALUE"},
+        )
+        return [value_range.get("values", []) for value_range in response["valueRanges"]]
+
+    def records_from_values(self, values: List[List[Any]]) -> List[Dict[str, Any]]:
+        """
+        Converts a worksheet value matrix into records keyed by the header row.
+
+        Args:
+            values (List[List[Any]]): The worksheet values, with the header as the first row.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per data row, like `get_all_records`.
+        """
+        if not values:
+            return []
+        header = values[0]
+        # Google Sheets trims trailing empty cells, so pad short rows to the header
+        return [
+            dict(zip(header, row + [""] * (len(header) - len(row))))
+            for row in values[1:]
+        ]
+
+    def cell_range(self, worksheet: gspread.Worksheet, row: int, col: int) -> str:
+        """
+        Builds the A1 range of a single cell, qualified with its worksheet title.
+
+        Ranges are computed once when data is cached, so the synchronization loop
+        only has to read them back.
+
+        Args:
+            worksheet (gspread.Worksheet): The worksheet holding the cell.
+            row (int): The row number of the cell (1-based).
+            col (int): The column number of the cell (1-based).
+
+        Returns:
+            str: The A1 range, e.g. "'PersediaanKopi'!C5".
+        """
+        return f"'{worksheet.title}'!{rowcol_to_a1(row, col)}"
+
+    def load_coffee_data(self, coffee_data: List[Dict[str, Any]]) -> Dict[str, CoffeeData]:
         """
         Loads coffee inventory data from the 'PersediaanKopi' worksheet into the local cache.
 
+        Args:
+            coffee_data (List[Dict[str, Any]]): The records of the 'PersediaanKopi' worksheet.
+
         Returns:
             Dict[str, CoffeeData]: A dictionary of coffee data with coffee names as keys.
         """
-        coffee_data = self.coffee_stock_ws.get_all_records()
-        with self.lock:
-            return {
-                row["Jenis Kopi"]: CoffeeData(
-                    name=row["Jenis Kopi"],
-                    price=int(row["Harga"]),
-                    stock=int(row["Sisa Persediaan"]),
-                    row_number=i + 2,  # Data rows start after the header (row 1)
-                )
-                for i, row in enumerate(coffee_data)
-            }
+        return {
+            row["Jenis Kopi"]: CoffeeData(
+                name=row["Jenis Kopi"],
+                price=int(row["Harga"]),
+                stock=int(row["Sisa Persediaan"]),
+                row_number=i + 2,  # Data rows start after the header (row 1)
+                stock_range=self.cell_range(self.coffee_stock_ws, i + 2, 3),
+            )
+            for i, row in enumerate(coffee_data)
+        }
 
-    def load_additive_data(self) -> Dict[str, int]:
+    def load_additive_data(self, additive_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """
         Loads additive inventory data from the 'PersediaanTambahan' worksheet.
 
+        The A1 range of each additive's stock cell is cached in `additive_ranges` at the
+        same time, so later updates do not have to download the worksheet again to find it.
+
+        Args:
+            additive_data (List[Dict[str, Any]]): The records of the 'PersediaanTambahan' worksheet.
+
         Returns:
             Dict[str, int]: A dictionary of additive data with additive names as keys.
         """
-        additive_data = self.additives_ws.get_all_records()
-        with self.lock:
-            return {
-                row["Jenis Bahan Tambahan"]: int(row["Sisa Persediaan"])
-                for row in additive_data
-            }
+        self.additive_ranges = {
+            # Data rows start after the header (row 1)
+            row["Jenis Bahan Tambahan"]: self.cell_range(self.additives_ws, idx + 2, 2)
+            for idx, row in enumerate(additive_data)
+        }
+        return {
+            row["Jenis Bahan Tambahan"]: int(row["Sisa Persediaan"])
+            for row in additive_data
+        }
 
-    def load_qr_code_list(self) -> List[QRCodeData]:
+    def load_qr_code_list(self, records: List[Dict[str, Any]]) -> List[QRCodeData]:
         """
         Loads QR payment reference data from the 'ReferenceID' worksheet into the local cache.
 
+        Args:
+            records (List[Dict[str, Any]]): The records of the 'ReferenceID' worksheet.
+
         Returns:
             List[QRCodeData]: A list of `QRCodeData` objects.
         """
-        records = self.qr_code_ws.get_all_records()
-        with self.lock:
-            qr_list = []
-            for i, record in enumerate(records):
-                qr_list.append(
-                    QRCodeData(
-                        ref_id=record["Reference ID"],
-                        total_price=int(record["Total Harga"]),
-                        payment_method=record["Metode"],
-                        timestamp=record["Timestamp"],
-                        status=record["Status"],
-                        row_number=i + 2,
-                    )
+        qr_list = []
+        for i, record in enumerate(records):
+            qr_list.append(
+                QRCodeData(
+                    ref_id=str(record["Reference ID"]),
+                    total_price=int(record["Total Harga"]),
+                    payment_method=record["Metode"],
+                    timestamp=record["Timestamp"],
+                    status=record["Status"],
+                    row_number=i + 2,
+                    status_range=self.cell_range(self.qr_code_ws, i + 2, 5),
                 )
-            return qr_list
+            )
+        return qr_list
 
-    def get_bestselling_coffee(self) -> str:
+    def get_sales_counts(self, rows: List[List[Any]]) -> Counter:
         """
-        Analyzes sales data to find the most sold coffee.
+        Tallies the total quantity sold for each coffee from the sales data.
+
+        The raw value rows are read directly instead of building a dictionary for
+        every sale.
+
+        Args:
+            rows (List[List[Any]]): The 'DataPenjualan' values, with the header as the first row.
 
         Returns:
-            str: The name of the bestselling coffee. Returns an empty string if there is no sales data.
+            Counter: A counter mapping coffee names to the total quantity sold.
         """
-        sales_data = self.sales_ws.get_all_records()
-        counts = {}
-        for row in sales_data:
-            name = row.get("jenis_kopi")
+        counts = Counter()
+        if not rows:
+            return counts
+
+        header = rows[0]
+        if "jenis_kopi" not in header or "Jumlah" not in header:
+            return counts
+        name_col = header.index("jenis_kopi")
+        quantity_col = header.index("Jumlah")
+
+        for row in rows[1:]:
+            if len(row) <= max(name_col, quantity_col):
+                continue
+            name = row[name_col]
             if not name:
                 continue
-            
-            if name not in counts:
-                counts[name] = 0
-            
+
             # Extract quantity from 'x{number}' format
-            quantity_str = row.get("Jumlah", "").replace("x", "")
-            try:
-                quantity_int = int(quantity_str)
-            except (ValueError, TypeError):
-                quantity_int = 0
-            
-            counts[name] += quantity_int
-
-        if not counts:
-            return ""
-        
-        # Find the coffee with the highest sales
-        bestseller = max(counts, key=counts.get)
-        return bestseller
+            counts[name] += self.parse_quantity(row[quantity_col])
+        return counts
+
+    def parse_quantity(self, quantity: str) -> int:
+        """
+        Parses a quantity stored in the 'x{number}' format.
+
+        Args:
+            quantity (str): The quantity string, e.g. 'x2'.
+
+        Returns:
+            int: The parsed quantity, or 0 if it is not a valid number.
+        """
+        match = _QTY_RE.fullmatch(str(quantity or ""))
+        return int(match.group(1)) if match else 0
+
+    def add_qr_code(self, qr_data: QRCodeData) -> None:
+        """
+        Adds a new QR payment reference to the local cache and its index, and
+        enqueues appending it to the 'ReferenceID' worksheet.
+
+        The reference can be used right away without waiting for Google Sheets. Its
+        row number is only assigned once the append succeeded, so its status is not
+        written to the worksheet before its row exists.
+
+        Args:
+            qr_data (QRCodeData): The QR payment data to be added.
+        """
+        row = [
+            qr_data.ref_id,
+            qr_data.total_price,
+            qr_data.payment_method,
+            qr_data.timestamp,
+            qr_data.status,
+        ]
+        with self.lock:
+            self.qr_code_list.append(qr_data)
+            self.qr_code_index[qr_data.ref_id] = qr_data
+        self.update_queue.put(("append_qr_codes", [row]))
+
+    def get_qr_code(self, ref_id: str) -> Optional[QRCodeData]:
+        """
+        Looks up cached QR payment data by its reference ID without taking the lock.
+
+        Writers only ever insert complete objects into the index and replace single
+        fields on them, and both are atomic in CPython, so readers that merely look
+        at the current status never need to wait for the synchronization thread.
+
+        Args:
+            ref_id (str): The reference ID of the QR transaction.
+
+        Returns:
+            Optional[QRCodeData]: The cached QR payment data, or None if not found.
+        """
+        return self.qr_code_index.get(ref_id)
+
+    def confirm_payment(self, ref_id: str) -> Optional[QRCodeData]:
+        """
+        Marks a pending QR payment as completed and enqueues the status update.
+
+        The status is checked and changed in a single critical section, so a
+        payment can only be confirmed once. The payment waiting on this reference,
+        if any, is woken up right away.
+
+        Args:
+            ref_id (str): The reference ID of the QR transaction.
+
+        Returns:
+            Optional[QRCodeData]: A copy of the confirmed payment data, or None if the
+                                  reference does not exist or is no longer pending.
+        """
+        with self.lock:
+            qr = self.qr_code_index.get(ref_id)
+            if qr is None or qr.status != "Pending":
+                return None
+            qr.status = "Selesai"
+            confirmed = dataclasses.replace(qr)
+        self.enqueue_update_qr_status(ref_id, "Selesai")
+        event = self.qr_events.get(ref_id)
+        if event is not None:
+            event.set()
+        return confirmed
+
+    def expire_payment(self, ref_id: str) -> bool:
+        """
+        Marks a pending QR payment as expired and enqueues the status update.
+
+        The status is checked and changed in the same critical section as in
+        `confirm_payment`, so a payment can never be both expired and confirmed.
+
+        Args:
+            ref_id (str): The reference ID of the QR transaction.
+
+        Returns:
+            bool: True if the payment was expired, False if it does not exist or is
+                  no longer pending, e.g. because it was confirmed in the meantime.
+        """
+        with self.lock:
+            qr = self.qr_code_index.get(ref_id)
+            if qr is None or qr.status != "Pending":
+                return False
+            qr.status = "Expired"
+        self.enqueue_update_qr_status(ref_id, "Expired")
+        return True
+
+    def get_bestselling_coffee(self) -> str:
+        """
+        Finds the most sold coffee from the local sales counter.
+
+        Returns:
+            str: The name of the bestselling coffee. Returns an empty string if there is no sales data.
+        """
+        with self.lock:
+            if not self.sales_counter:
+                return ""
+            return self.sales_counter.most_common(1)[0][0]
 
     def periodic_sync(self) -> None:
         """
-        Runs an infinite loop for periodic data synchronization.
-        
-        This method processes all items in the `update_queue` and then
-        pushes data changes (stock, QR status) to Google Sheets.
+        Runs the periodic data synchronization loop until `stop_event` is set.
+
+        This method waits until operations arrive in the `update_queue` or the
+        synchronization interval passes, processes the collected operations, and then
+        pushes data changes (stock, QR status) to Google Sheets. Operations that could
+        not be applied are retried in the next round.
         """
-        while True:
+        while not self.stop_event.is_set():
             try:
-                # Process all operations in the queue until it's empty
-                while not self.update_queue.empty():
-                    operation = self.update_queue.get_nowait()
-                    op_type = operation[0]
-                    
-                    if op_type == "update_stock":
-                        _, coffee_name, quantity_sold = operation
-                        self.update_stock(coffee_name, quantity_sold)
-                    elif op_type == "restock_coffee":
-                        _, coffee_name, restock_quantity = operation
-                        self.restock_coffee(coffee_name, restock_quantity)
-                    elif op_type == "update_qr_status":
-                        _, ref_id, new_status = operation
-                        self.update_qr_status(ref_id, new_status)
-                    elif op_type == "log_sale":
-                        _, sales_record = operation
-                        self.log_sale(sales_record)
-                    elif op_type == "update_additive":
-                        _, additive, quantity = operation
-                        self.update_additive(additive, quantity)
-
-                # Synchronize coffee data to Google Sheets
-                with self.lock:
-                    for coffee in self.coffee_list.values():
-                        self.coffee_stock_ws.update_cell(
-                            coffee.row_number, 3, coffee.stock
-                        )
-
-                # Synchronize additive data
-                additive_data = self.additives_ws.get_all_records()
-                additive_row_map = {
-                    row["Jenis Bahan Tambahan"]: idx + 2
-                    for idx, row in enumerate(additive_data)
-                }
-                for additive, stock in self.additives_list.items():
-                    row_number = additive_row_map.get(additive)
-                    if row_number:
-                        self.additives_ws.update_cell(row_number, 2, stock)
-
-                # Synchronize QR status
-                for qr in self.qr_code_list:
-                    self.qr_code_ws.update_cell(qr.row_number, 5, qr.status)
-
-                time.sleep(Configuration.SYNC_INTERVAL)
+                # Wait for queued operations (or the sync interval) and process them
+                self.apply_operations(self.wait_for_operations())
+
+                # Synchronize stock and QR status data to Google Sheets
+                self.sync_to_sheets()
 
             except Exception as e:
                 print(f"⚠ - Terjadi kesalahan saat sinkronisasi periodik:\n{e}")
-                time.sleep(Configuration.SYNC_INTERVAL)
+                self.stop_event.wait(Configuration.SYNC_INTERVAL)
 
-    def enqueue_update_stock(self, coffee_name: str, quantity_sold: int) -> None:
+    def apply_operations(self, operations: List[tuple]) -> None:
         """
-        Adds a coffee stock reduction operation to the queue.
+        Coalesces a batch of queued operations with the ones still pending and
+        applies them to the cache.
+
+        Each operation is dispatched to its handler by type, with the remaining
+        elements of the operation tuple passed as arguments. Every operation is tried
+        even if an earlier one fails, so a failed QR append does not hold back the
+        sales log. The failed operations stay in `pending_operations` for the next
+        round, and the first error is raised once all operations were tried.
 
         Args:
-            coffee_name (str): The name of the coffee whose stock will be reduced.
-            quantity_sold (int): The amount of stock to be reduced.
+            operations (List[tuple]): The queued operations, in order.
+
+        Raises:
+            Exception: The first error raised by a handler, if any failed.
         """
-        self.update_queue.put(("update_stock", coffee_name, quantity_sold))
+        failed = []
+        error = None
+        for operation in self.coalesce_operations(self.pending_operations + operations):
+            op_type, *args = operation
+            handler = self.operation_handlers.get(op_type)
+            if not handler:
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                failed.append(operation)
+                error = error or e
+        self.pending_operations = failed
+        if error is not None:
+            raise error
 
-    def enqueue_restock_coffee(self, coffee_name: str, restock_quantity: int) -> None:
+    def wait_for_operations(self) -> List[tuple]:
         """
-        Adds a coffee stock increase (restock) operation to the queue.
+        Blocks until an operation is queued or the synchronization interval passes.
 
-        Args:
-            coffee_name (str): The name of the coffee to be restocked.
-            restock_quantity (int): The amount of stock to be added.
+        Once the first operation arrives, the operations queued during the batching
+        window are collected as well, so a burst is synchronized in one round.
+
+        Returns:
+            List[tuple]: The collected operations, or an empty list if none arrived in time.
         """
-        self.update_queue.put(("restock_coffee", coffee_name, restock_quantity))
+        try:
+            first_operation = self.update_queue.get(timeout=Configuration.SYNC_INTERVAL)
+        except queue.Empty:
+            return []
 
-    def enqueue_update_qr_status(self, ref_id: str, new_status: str) -> None:
+        self.stop_event.wait(Configuration.SYNC_BATCH_WINDOW)
+        return [first_operation] + self.drain_queue()
+
+    def drain_queue(self) -> List[tuple]:
         """
-        Adds a QR payment status update operation to the queue.
+        Takes every operation currently in the queue without blocking.
 
-        Args:
-            ref_id (str): The reference ID of the QR transaction.
-            new_status (str): The new status ('Selesai', 'Expired').
+        Returns:
+            List[tuple]: The operations taken from the queue, in order.
         """
-        self.update_queue.put(("update_qr_status", ref_id, new_status))
+        operations = []
+        while True:
+            try:
+                operations.append(self.update_queue.get_nowait())
+            except queue.Empty:
+                return operations
 
-    def enqueue_log_sale(self, sales_record: SalesRecord) -> None:
+    def coalesce_operations(self, operations: List[tuple]) -> List[tuple]:
         """
-        Adds a new sales data logging operation to the queue.
+        Folds a batch of queued operations so each target is processed only once.
+
+        Only the last status of each QR reference is kept, all new QR references and
+        all sales records are each merged into a single operation, and sync requests
+        are dropped.
 
         Args:
-            sales_record (SalesRecord): The sales data object to be logged.
+            operations (List[tuple]): The queued operations, in order.
+
+        Returns:
+            List[tuple]: The coalesced operations.
+        """
+        qr_statuses = {}
+        sales_records = []
+        qr_rows = []
+
+        for operation in operations:
+            op_type = operation[0]
+            if op_type == "update_qr_status":
+                _, ref_id, _ = operation
+                qr_statuses[ref_id] = operation
+            elif op_type == "log_sales":
+                _, records = operation
+                sales_records.extend(records)
+            elif op_type == "append_qr_codes":
+                _, rows = operation
+                qr_rows.extend(rows)
+            # "sync" operations only wake up the thread; the whole cache is
+            # pushed after every batch anyway
+
+        # New QR references come first, so their rows exist before any status update
+        result = [("append_qr_codes", qr_rows)] if qr_rows else []
+        result.extend(qr_statuses.values())
+        if sales_records:
+            result.append(("log_sales", sales_records))
+        return result
+
+    def cached_cells(self) -> Dict[str, Any]:
+        """
+        Collects the value of every synchronized cell from the local cache.
+
+        Must be called while holding the lock.
+
+        Returns:
+            Dict[str, Any]: A mapping of A1 ranges to their cached values.
         """
-        self.update_queue.put(("log_sale", sales_record))
+        cells = {}
+        # Coffee stock (column C)
+        for coffee in self.coffee_list.values():
+            cells[coffee.stock_range] = coffee.stock
+
+        # Additive stock (column B)
+        for additive, stock in self.additives_list.items():
+            stock_range = self.additive_ranges.get(additive)
+            if stock_range:
+                cells[stock_range] = stock
+
+        # QR status (column E), for the references whose row was appended
+        for qr in self.qr_code_list:
+            if qr.status_range:
+                cells[qr.status_range] = qr.status
+        return cells
 
-    def enqueue_update_additive(self, additive: str, quantity: int) -> None:
+    def sync_to_sheets(self) -> None:
         """
-        Adds an additive stock update operation to the queue.
+        Pushes the changed coffee stock, additive stock, and QR statuses to Google Sheets.
+
+        Only cells whose cached value differs from the last value written are sent,
+        all in a single batch update request. No request is made when nothing changed.
+        """
+        with self.lock:
+            changed = {
+                cell_range: value
+                for cell_range, value in self.cached_cells().items()
+                if self.synced_values.get(cell_range) != value
+            }
+        if not changed:
+            return
+
+        self.spreadsheet.values_batch_update(
+            {
+                "valueInputOption": "USER_ENTERED",
+                "data": [
+                    {"range": cell_range, "values": [[value]]}
+                    for cell_range, value in changed.items()
+                ],
+            }
+        )
+        # Only remember the values once they were written successfully
+        self.synced_values.update(changed)
+
+    def request_sync(self) -> None:
+        """
+        Wakes up the synchronization thread to push the current cache to Google Sheets.
+
+        Used after changes that are applied to the cache directly, such as restocks.
+        """
+        self.update_queue.put(("sync",))
+
+    def enqueue_update_qr_status(self, ref_id: str, new_status: str) -> None:
+        """
+        Adds a QR payment status update operation to the queue.
 
         Args:
-            additive (str): The name of the additive to be updated.
-            quantity (int): The amount to be added (positive) or reduced (negative).
+            ref_id (str): The reference ID of the QR transaction.
+            new_status (str): The new status ('Selesai', 'Expired').
         """
-        self.update_queue.put(("update_additive", additive, quantity))
+        self.update_queue.put(("update_qr_status", ref_id, new_status))
 
-    def update_stock(self, coffee_name: str, quantity_sold: int) -> None:
+    def enqueue_log_sales(self, sales_records: List[SalesRecord]) -> None:
         """
-        Updates the coffee stock in the local cache. This is an internal operation.
+        Adds the sales data logging of a whole order to the queue as a single operation.
 
         Args:
-            coffee_name (str): The name of the coffee whose stock is being updated.
-            quantity_sold (int): The quantity sold (to be subtracted from the stock).
+            sales_records (List[SalesRecord]): The sales data of every item in the order.
         """
-        if coffee_name in self.coffee_list:
-            coffee = self.coffee_list[coffee_name]
-            coffee.stock = max(0, coffee.stock - quantity_sold)
+        self.count_sales(sales_records)
+        self.update_queue.put(("log_sales", list(sales_records)))
 
-    def restock_coffee(self, coffee_name: str, restock_quantity: int) -> None:
+    def count_sales(self, sales_records: List[SalesRecord]) -> None:
         """
-        Increases the coffee stock in the local cache. This is an internal operation.
+        Adds the quantities of new sales to the local sales counter.
+
+        Sales are counted when they are enqueued, so the bestseller is up to date
+        before the synchronization thread writes them to Google Sheets.
 
         Args:
-            coffee_name (str): The name of the restocked coffee.
-            restock_quantity (int): The amount of stock added.
+            sales_records (List[SalesRecord]): The sales data objects to be counted.
         """
-        if coffee_name in self.coffee_list:
-            coffee = self.coffee_list[coffee_name]
-            coffee.stock += restock_quantity
+        with self.lock:
+            for sales_record in sales_records:
+                self.sales_counter[sales_record.coffee_type] += self.parse_quantity(
+                    sales_record.quantity
+                )
 
     def update_qr_status(self, ref_id: str, new_status: str) -> None:
         """
@@ -365,19 +685,51 @@ class DatabaseManager:
             ref_id (str): The reference ID of the QR transaction.
             new_status (str): The new status for the transaction.
         """
-        for qr in self.qr_code_list:
-            if qr.ref_id == ref_id:
-                qr.status = new_status
-                break
+        qr = self.qr_code_index.get(ref_id)
+        if qr:
+            qr.status = new_status
+
+    def append_qr_codes(self, rows: List[List[Any]]) -> None:
+        """
+        Appends new QR payment references to the 'ReferenceID' worksheet.
+
+        All rows are appended with a single `append_rows` request. The row numbers
+        of the references are taken from the range Google Sheets reports as updated,
+        and the status each row was appended with is recorded as synchronized.
+
+        Args:
+            rows (List[List[Any]]): The worksheet rows of the new references.
+        """
+        if not rows:
+            return
+        response = self.qr_code_ws.append_rows(
+            rows, value_input_option="RAW", insert_data_option="INSERT_ROWS"
+        )
+        # The updated range looks like 'ReferenceID'!A5:E6
+        updated_range = response["updates"]["updatedRange"]
+        first_row, _ = a1_to_rowcol(updated_range.split("!")[-1].split(":")[0])
+        with self.lock:
+            for row_number, row in enumerate(rows, start=first_row):
+                qr = self.qr_code_index.get(row[0])
+                if qr is None:
+                    continue
+                qr.row_number = row_number
+                qr.status_range = self.cell_range(self.qr_code_ws, row_number, 5)
+                self.synced_values[qr.status_range] = row[4]
 
-    def log_sale(self, sales_record: SalesRecord) -> None:
+    def log_sales(self, sales_records: List[SalesRecord]) -> None:
         """
-        Logs new sales data to the 'DataPenjualan' worksheet.
+        Logs a batch of sales data to the 'DataPenjualan' worksheet.
+
+        All rows are appended with a single `append_rows` request, however many
+        sales were collected during the synchronization window.
 
         Args:
-            sales_record (SalesRecord): The sales data object.
+            sales_records (List[SalesRecord]): The sales data objects.
         """
-        self.sales_ws.append_row(
+        if not sales_records:
+            return
+        rows = [
             [
                 sales_record.coffee_type,
                 sales_record.temperature,
@@ -386,108 +738,122 @@ class DatabaseManager:
                 sales_record.total_price,
                 sales_record.payment_method,
             ]
+            for sales_record in sales_records
+        ]
+        self.sales_ws.append_rows(
+            rows, value_input_option="RAW", insert_data_option="INSERT_ROWS"
         )
 
-    def update_additive(self, additive: str, quantity: int) -> None:
-        """
-        Updates the additive stock in the local cache. This is an internal operation.
-
-        Args:
-            additive (str): The name of the updated additive.
-            quantity (int): The amount to be added or subtracted.
-        """
-        if additive in self.additives_list:
-            self.additives_list[additive] = max(0, self.additives_list[additive] + quantity)
-
     def save_changes_before_exit(self) -> None:
         """
         Forces synchronization of all pending changes before the program exits.
         
-        This method empties the update queue and sends all changes
-        directly to Google Sheets.
+        This method stops the synchronization thread and waits for its current round
+        to finish, then empties the update queue and sends all changes directly
+        to Google Sheets, the operations still pending from failed rounds included.
+        Operations that fail again stay in `pending_operations`.
         """
+        # Wake the synchronization thread so it stops without waiting for its interval
+        self.stop_event.set()
+        self.request_sync()
+        self.sync_thread.join()
+
         try:
             # Process all remaining items in the queue
-            while not self.update_queue.empty():
-                operation = self.update_queue.get_nowait()
-                op_type = operation[0]
-                if op_type == "update_stock":
-                    _, coffee_name, quantity_sold = operation
-                    self.update_stock(coffee_name, quantity_sold)
-                elif op_type == "restock_coffee":
-                    _, coffee_name, restock_quantity = operation
-                    self.restock_coffee(coffee_name, restock_quantity)
-                elif op_type == "update_qr_status":
-                    _, ref_id, new_status = operation
-                    self.update_qr_status(ref_id, new_status)
-                elif op_type == "log_sale":
-                    _, sales_record = operation
-                    self.log_sale(sales_record)
-                elif op_type == "update_additive":
-                    _, additive, quantity = operation
-                    self.update_additive(additive, quantity)
+            self.apply_operations(self.drain_queue())
 
             # Perform a final update to Google Sheets for all data
-            with self.lock:
-                # Update coffee stock
-                for coffee in self.coffee_list.values():
-                    self.coffee_stock_ws.update_cell(
-                        coffee.row_number, 3, coffee.stock
-                    )
-
-                # Update additive stock
-                additive_data = self.additives_ws.get_all_records()
-                additive_row_map = {
-                    row["Jenis Bahan Tambahan"]: idx + 2
-                    for idx, row in enumerate(additive_data)
-                }
-                for additive, stock in self.additives_list.items():
-                    row_number = additive_row_map.get(additive)
-                    if row_number:
-                        self.additives_ws.update_cell(row_number, 2, stock)
-
-                # Update QR status
-                for qr in self.qr_code_list:
-                    self.qr_code_ws.update_cell(qr.row_number, 5, qr.status)
+            self.sync_to_sheets()
 
         except Exception as e:
             print(f"⚠ - Terjadi kesalahan saat menyimpan perubahan terakhir:\n{e}")
-            time.sleep(Configuration.SYNC_INTERVAL) # Pause if an error occurs
+            if self.pending_operations:
+                print(
+                    f"⚠ - {len(self.pending_operations)} operasi belum tersimpan ke Google Sheets."
+                )
 
     def restock_coffee_sync(self, coffee_name: str, restock_quantity: int) -> None:
         """
-        Performs a synchronous coffee restock (directly to Google Sheets).
+        Performs an immediate coffee restock in the local cache.
+
+        The new stock is visible right away, while writing it to Google Sheets is left
+        to the synchronization thread, which is woken up instead of waiting for its interval.
 
         Args:
             coffee_name (str): The name of the coffee to be restocked.
             restock_quantity (int): The amount of stock to be added.
         """
         with self.lock:
-            if coffee_name in self.coffee_list:
-                coffee = self.coffee_list[coffee_name]
-                coffee.stock += restock_quantity
-                # Directly update Google Sheets
-                self.coffee_stock_ws.update_cell(coffee.row_number, 3, coffee.stock)
+            if coffee_name not in self.coffee_list:
+                return
+            self.coffee_list[coffee_name].stock += restock_quantity
+        self.request_sync()
 
     def restock_additives_sync(self, additive: str, restock_quantity: int) -> None:
         """
-        Performs a synchronous additive restock (directly to Google Sheets).
+        Performs an immediate additive restock in the local cache.
+
+        The new stock is visible right away, while writing it to Google Sheets is left
+        to the synchronization thread, which is woken up instead of waiting for its interval.
 
         Args:
             additive (str): The name of the additive to be restocked.
             restock_quantity (int): The amount of stock to be added.
         """
         with self.lock:
-            if additive in self.additives_list:
-                self.additives_list[additive] += restock_quantity
-                # Directly update Google Sheets
-                records = self.additives_ws.get_all_records()
-                additive_row_map = {
-                    row["Jenis Bahan Tambahan"]: idx + 2
-                    for idx, row in enumerate(records)
-                }
-                row_number = additive_row_map.get(additive)
-                if row_number:
-                    self.additives_ws.update_cell(
-                        row_number, 2, self.additives_list[additive]
-                    )
+            if additive not in self.additives_list:
+                return
+            self.additives_list[additive] += restock_quantity
+        self.request_sync()
+
+    def reserve_stock(
+        self, coffee_name: str, quantity: int, additives: Dict[str, int]
+    ) -> bool:
+        """
+        Atomically checks and reserves the stock needed by an order item in the local cache.
+
+        The reservation is taken out of the cached stock right away, so it is already
+        in place when the order is paid. It must be returned with `release_stock` if
+        the order is canceled or the payment fails.
+
+        Args:
+            coffee_name (str): The name of the ordered coffee.
+            quantity (int): The number of coffees ordered.
+            additives (Dict[str, int]): A mapping of additive names to the amount needed.
+
+        Returns:
+            bool: True if the stock was reserved, False if it is insufficient.
+        """
+        with self.lock:
+            coffee = self.coffee_list.get(coffee_name)
+            if coffee is None or coffee.stock < quantity:
+                return False
+            if any(
+                self.additives_list.get(additive, 0) < amount
+                for additive, amount in additives.items()
+            ):
+                return False
+
+            coffee.stock -= quantity
+            for additive, amount in additives.items():
+                if amount:
+                    self.additives_list[additive] -= amount
+            return True
+
+    def release_stock(
+        self, coffee_name: str, quantity: int, additives: Dict[str, int]
+    ) -> None:
+        """
+        Returns stock previously taken by `reserve_stock` to the local cache.
+
+        Args:
+            coffee_name (str): The name of the ordered coffee.
+            quantity (int): The number of coffees to return.
+            additives (Dict[str, int]): A mapping of additive names to the amount to return.
+        """
+        with self.lock:
+            if coffee_name in self.coffee_list:
+                self.coffee_list[coffee_name].stock += quantity
+            for additive, amount in additives.items():
+                if additive in self.additives_list:
+                    self.additives_list[additive] += amount
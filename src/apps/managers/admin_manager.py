@@ -12,9 +12,14 @@ Key functionalities include:
 - `shutdown_program`: Safely shuts down the application after saving all pending changes.
 """
 
+import hmac
+
 from apps.database.database_manager import DatabaseManager
 from apps.utils.input_utils import input_with_timeout
 
+# Answers that start another restock round
+_YES_ANSWERS = frozenset({"y", "ya"})
+
 class AdminManager:
     """
     Manages admin features: restocking, changing admin code, and program shutdown.
@@ -38,26 +43,29 @@ class AdminManager:
         Prompts for the admin code and performs authentication.
         Allows a maximum of 5 attempts.
 
+        The input is compared as digits in constant time instead of being parsed,
+        so neither a very long input nor the comparison time reveals anything.
+
         Returns:
             bool: True if authentication is successful, False if it fails or is canceled.
         """
         max_attempts = 5
         attempts = 0
+        admin_code = str(self.db_manager.admin_code).encode()
         while attempts < max_attempts:
             code_input = input_with_timeout(
-                self.db_manager, "Masukkan kode admin ('x' untuk batal): "
-            )
+                "Masukkan kode admin ('x' untuk batal): "
+            ).strip()
             if code_input.lower() == "x":
                 print("❌ - Membatalkan aksi admin.\n")
                 return False
-            try:
-                code = int(code_input)
-            except ValueError:
+            if not code_input.isdecimal() or not code_input.isascii():
                 print("⚠ - Kode admin harus berupa angka.")
                 attempts += 1
                 continue
 
-            if code == self.db_manager.admin_code:
+            # Leading zeros did not count when the code was compared as a number
+            if hmac.compare_digest((code_input.lstrip("0") or "0").encode(), admin_code):
                 print("✅ - Autentikasi berhasil.\n")
                 return True
             else:
@@ -75,19 +83,20 @@ class AdminManager:
         """
         print("\n*********** Menu Restock Kopi ************")
         coffee_list = self.db_manager.coffee_list
+        # Restocking only changes stock levels, so the numbering is built once
+        number_map = dict(
+            enumerate((coffee for coffee in coffee_list.values() if coffee.stock >= 0), start=1)
+        )
         while True:
-            print("==== Daftar Kopi ====")
-            number_map = {}
-            number = 1
-            for coffee in coffee_list.values():
-                if coffee.stock >= 0:
-                    print(f"{number}. {coffee.name} - Stok: {coffee.stock}")
-                    number_map[number] = coffee
-                    number += 1
-            print("=====================")
+            # Collect the list and print it with a single call
+            lines = ["==== Daftar Kopi ===="]
+            for number, coffee in number_map.items():
+                lines.append(f"{number}. {coffee.name} - Stok: {coffee.stock}")
+            lines.append("=====================")
+            print("\n".join(lines))
 
             coffee_choice_input = input_with_timeout(
-                self.db_manager, "Pilih kopi untuk restock ('x' untuk batal): "
+                "Pilih kopi untuk restock ('x' untuk batal): "
             )
             if coffee_choice_input.lower() == "x":
                 print("❌ - Membatalkan restock kopi.\n")
@@ -104,7 +113,6 @@ class AdminManager:
             # Get the restock amount
             while True:
                 restock_amount_input = input_with_timeout(
-                    self.db_manager,
                     f"Masukkan jumlah restock untuk {coffee.name} ('x' untuk batal): ",
                 )
                 if restock_amount_input.lower() == "x":
@@ -115,7 +123,7 @@ class AdminManager:
                     if restock_amount <= 0:
                         print("⚠ - Jumlah restock harus > 0.")
                         continue
-                    # Use the synchronous method for restocking
+                    # Restock the cache immediately; the sync thread writes it to Google Sheets
                     self.db_manager.restock_coffee_sync(coffee.name, restock_amount)
                     print(
                         f"✅ - Berhasil restock {coffee.name} sebanyak {restock_amount}.\n"
@@ -125,9 +133,9 @@ class AdminManager:
                     print("⚠ - Masukkan harus berupa angka.")
 
             more_input = input_with_timeout(
-                self.db_manager, "\nApakah ingin melakukan restock lagi? (y/n): "
+                "\nApakah ingin melakukan restock lagi? (y/n): "
             ).lower()
-            if more_input in ["y", "ya"]:
+            if more_input in _YES_ANSWERS:
                 continue
             else:
                 print("\n🔃 - Kembali ke submenu admin.\n")
@@ -140,18 +148,17 @@ class AdminManager:
         """
         print("\n*********** Menu Restock Bahan Tambahan ************")
         additives_list = self.db_manager.additives_list
+        # Restocking only changes stock levels, so the numbering is built once
+        number_map = dict(enumerate(additives_list, start=1))
         while True:
-            print("==== Daftar Bahan Tambahan ====")
-            number_map = {}
-            number = 1
-            for additive, stock in additives_list.items():
-                print(f"{number}. {additive} - Stok: {stock}")
-                number_map[number] = additive
-                number += 1
-            print("===============================")
+            # Collect the list and print it with a single call
+            lines = ["==== Daftar Bahan Tambahan ===="]
+            for number, additive in number_map.items():
+                lines.append(f"{number}. {additive} - Stok: {additives_list[additive]}")
+            lines.append("===============================")
+            print("\n".join(lines))
 
             additive_choice_input = input_with_timeout(
-                self.db_manager,
                 "Pilih bahan tambahan untuk restock ('x' untuk batal): ",
             )
             if additive_choice_input.lower() == "x":
@@ -169,7 +176,6 @@ class AdminManager:
             # Get the restock amount
             while True:
                 restock_amount_input = input_with_timeout(
-                    self.db_manager,
                     f"Masukkan jumlah restock untuk {additive} ('x' untuk batal): ",
                 )
                 if restock_amount_input.lower() == "x":
@@ -180,7 +186,7 @@ class AdminManager:
                     if restock_amount <= 0:
                         print("⚠ - Jumlah restock harus > 0.")
                         continue
-                    # Use the synchronous method for restocking
+                    # Restock the cache immediately; the sync thread writes it to Google Sheets
                     self.db_manager.restock_additives_sync(additive, restock_amount)
                     print(
                         f"✅ - Berhasil restock {additive} sebanyak {restock_amount} takaran.\n"
@@ -190,9 +196,9 @@ class AdminManager:
                     print("⚠ - Masukkan harus berupa angka.")
 
             more_input = input_with_timeout(
-                self.db_manager, "\nApakah ingin melakukan restock lagi? (y/n): "
+                "\nApakah ingin melakukan restock lagi? (y/n): "
             ).lower()
-            if more_input in ["y", "ya"]:
+            if more_input in _YES_ANSWERS:
                 continue
             else:
                 print("\n🔃 - Kembali ke submenu admin.\n")
@@ -206,7 +212,7 @@ class AdminManager:
         print("\n*********** Ganti Kode Admin ************")
         while True:
             new_code_input = input_with_timeout(
-                self.db_manager, "Masukkan kode admin baru ('x' untuk batal): "
+                "Masukkan kode admin baru ('x' untuk batal): "
             )
             if new_code_input.lower() == "x":
                 print("❌ - Membatalkan penggantian kode admin.\n")
@@ -226,11 +232,12 @@ class AdminManager:
         """
         Shuts down the program after admin authentication.
         If authentication is successful, the program exits after a final sync.
+
+        Raises:
+            SystemExit: Always, once the pending changes are saved.
         """
         print("\n*********** Menonaktifkan Program ************")
         print("💤 - Mesin kopi bersiap untuk dimatikan. Menyimpan perubahan terakhir...")
         self.db_manager.save_changes_before_exit()
         print("👋 - Mesin kopi berhasil dimatikan.")
-
-        import sys
-        sys.exit(0)
+        raise SystemExit(0)
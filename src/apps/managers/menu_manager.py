@@ -8,10 +8,13 @@ Its primary tasks are:
   and a special indicator for the bestselling coffee.
 """
 
-from typing import Dict
+from typing import Dict, Optional
 
 from apps.data_classes import CoffeeData
 
+_MENU_HEADER = "================ Menu Kopi ================="
+_MENU_FOOTER = "============================================="
+
 class MenuManager:
     """
     Manages the display and selection of the coffee menu.
@@ -21,6 +24,9 @@ class MenuManager:
     Attributes:
         coffee_list (Dict[str, CoffeeData]): A dictionary mapping coffee names to CoffeeData objects.
         bestselling_coffee_name (str): The name of the bestselling coffee.
+        coffee_by_number (Dict[int, CoffeeData]): The available coffees keyed by their menu number.
+        rendered_menu (Optional[str]): The menu text, rendered on first display and
+                                       reused until it is invalidated.
     """
 
     def __init__(self, coffee_list: Dict[str, CoffeeData], bestselling_coffee_name: str = ""):
@@ -33,30 +39,88 @@ class MenuManager:
         """
         self.coffee_list = coffee_list
         self.bestselling_coffee_name = bestselling_coffee_name
+        self.coffee_by_number: Dict[int, CoffeeData] = {}
+        self.rendered_menu: Optional[str] = None
+
+    def invalidate_menu(self) -> None:
+        """
+        Discards the rendered menu, so it is rendered again on its next display.
+        Must be called whenever the stock of a coffee changes.
+        """
+        self.rendered_menu = None
+
+    def set_bestselling_coffee(self, bestselling_coffee_name: str) -> None:
+        """
+        Updates the bestselling coffee marked on the menu.
+
+        Args:
+            bestselling_coffee_name (str): The name of the new bestselling coffee.
+        """
+        if bestselling_coffee_name != self.bestselling_coffee_name:
+            self.bestselling_coffee_name = bestselling_coffee_name
+            self.invalidate_menu()
+
+    def numbering_is_current(self) -> bool:
+        """
+        Checks whether the coffee numbers still match the coffees in stock.
+
+        Orders and restocks only change stock levels in place, so the numbers
+        only have to be assigned again once a coffee runs out or comes back.
+
+        Returns:
+            bool: True if exactly the coffees in stock are numbered.
+        """
+        available = sum(1 for coffee in self.coffee_list.values() if coffee.stock > 0)
+        return available == len(self.coffee_by_number) and all(
+            coffee.stock > 0 for coffee in self.coffee_by_number.values()
+        )
 
     def set_coffee_numbers(self) -> None:
         """
         Assigns a sequential number to each coffee that has a stock greater than 0.
         This number is used for user selection from the menu.
+
+        The lookup by number and the menu text are built in the same pass.
         """
-        number = 1
+        self.coffee_by_number = {}
+        lines = [_MENU_HEADER]
         for coffee in self.coffee_list.values():
             if coffee.stock > 0:
-                coffee.number = number
-                number += 1
+                coffee.number = len(self.coffee_by_number) + 1
+                self.coffee_by_number[coffee.number] = coffee
+                lines.append(self.format_menu_line(coffee))
+        lines.append(_MENU_FOOTER)
+        self.rendered_menu = "\n".join(lines)
+
+    def format_menu_line(self, coffee: CoffeeData) -> str:
+        """
+        Formats the menu line of a coffee.
+
+        Args:
+            coffee (CoffeeData): The coffee to be displayed.
+
+        Returns:
+            str: The menu line, with a star symbol (★) if the coffee is the bestseller.
+        """
+        star = " ★" if coffee.name == self.bestselling_coffee_name else ""
+        return f"{coffee.number}. {coffee.name}{star} - Rp{coffee.price} - Persediaan: {coffee.stock}"
 
     def display_coffee_menu(self) -> None:
         """
         Displays the available coffee menu.
         
         If a coffee is the bestseller, it adds a star symbol (★) next to its name.
-        Only coffees with a positive stock level are displayed.
+        Only coffees with a positive stock level are displayed. The menu is rendered
+        once and printed with a single call until it is invalidated.
+
+        Only the numbered coffees are candidates, so a coffee restocked after the
+        numbering is not shown with a number that cannot be selected.
         """
-        print("================ Menu Kopi =================")
-        for coffee in self.coffee_list.values():
-            if coffee.stock > 0:
-                star = " ★" if coffee.name == self.bestselling_coffee_name else ""
-                print(
-                    f"{coffee.number}. {coffee.name}{star} - Rp{coffee.price} - Persediaan: {coffee.stock}"
-                )
-        print("=============================================")
+        if self.rendered_menu is None:
+            lines = [_MENU_HEADER]
+            for coffee in self.coffee_by_number.values():
+                if coffee.stock > 0:
+                    lines.append(self.format_menu_line(coffee))
+            lines.append(_MENU_FOOTER)
+            self.rendered_menu = "\n".join(lines)
+        print(self.rendered_menu)
@@ -13,11 +13,49 @@ Key functionalities include:
 - Updating the local stock cache and logging the sale.
 """
 
-import cv2
+from collections import defaultdict
+from functools import lru_cache
+import time
+
+from gspread.utils import rowcol_to_a1
 
 from apps.database.database_manager import DatabaseManager
 from apps.managers.order_manager import OrderManager
 from apps.data_classes import CompositionData, SalesRecord
+from credentials.config import Configuration
+
+# Only every n-th grabbed frame is decoded and passed to the QR detector
+_FRAME_SKIP = 3
+
+# Capture resolution; QR codes held up to the scanner are readable well below full HD
+_FRAME_WIDTH = 640
+_FRAME_HEIGHT = 480
+
+# Order queue columns read for every order row
+_REQUIRED_COLUMNS = ("QR", "Status", "Jenis kopi", "Jumlah", "Suhu")
+
+@lru_cache(maxsize=256)
+def _format_composition(composition: CompositionData) -> str:
+    """
+    Builds the sales log string of a composition, cached since most orders
+    share a few common compositions.
+
+    Args:
+        composition (CompositionData): The composition object to be formatted.
+
+    Returns:
+        str: A string representation of the composition.
+    """
+    parts = []
+    if composition.sugar > 0:
+        parts.append(f"Gula: {composition.sugar}")
+    if composition.creamer > 0:
+        parts.append(f"Krimer: {composition.creamer}")
+    if composition.milk > 0:
+        parts.append(f"Susu: {composition.milk}")
+    if composition.chocolate > 0:
+        parts.append(f"Cokelat: {composition.chocolate}")
+    return ", ".join(parts) if parts else "Tanpa tambahan"
 
 class OnlineOrderManager:
     """Manages the processing of scanning QR codes for online order queues."""
@@ -45,141 +83,202 @@ class OnlineOrderManager:
         Returns:
             str: A string representation of the composition.
         """
-        parts = []
-        if composition.sugar > 0:
-            parts.append(f"Gula: {composition.sugar}")
-        if composition.creamer > 0:
-            parts.append(f"Krimer: {composition.creamer}")
-        if composition.milk > 0:
-            parts.append(f"Susu: {composition.milk}")
-        if composition.chocolate > 0:
-            parts.append(f"Cokelat: {composition.chocolate}")
-        return ", ".join(parts) if parts else "Tanpa tambahan"
-
-    def scan_qr(self) -> None:
-        """Scans a QR code and confirms orders with a `Pending` status."""
+        return _format_composition(composition)
+
+    def read_qr_code(self) -> str:
+        """
+        Reads a QR code from the camera.
+
+        The camera is released as soon as a code is decoded, or when scanning stops
+        because it was canceled, a frame could not be read, or no code was shown
+        within the input timeout.
+
+        Returns:
+            str: The decoded QR code, or an empty string if none was read.
+        """
+        # OpenCV is heavy to load, so it is only imported once a scan is requested
+        import cv2
+
         detector = cv2.QRCodeDetector()
         cap = cv2.VideoCapture(0)
 
         if not cap.isOpened():
             print("\n⚠ - Tidak dapat membuka pemindai QR.\n\n")
-            return
-        print("\n\n*********** Pindai QR Code ************")
-        print("Dekatkan QR Code ke alat pemindai QR")
+            return ""
+        # Keep only the latest frame buffered and prefer MJPEG, which is cheap to ingest
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        # Capture at a low resolution once instead of resizing every frame
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, _FRAME_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, _FRAME_HEIGHT)
+        print(
+            "\n\n*********** Pindai QR Code ************\n"
+            "Dekatkan QR Code ke alat pemindai QR"
+        )
 
-        qr_code = ""
+        frame_count = 0
+        deadline = time.monotonic() + Configuration.TIMEOUT_DURATION
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
+            while time.monotonic() < deadline:
+                # Grab every frame to keep up with the camera, but only decode
+                # the frames that are actually handed to the detector
+                if not cap.grab():
                     print("⚠ - Tidak dapat membaca frame dari pemindai QR.\n\n")
-                    break
-                data, _, _ = detector.detectAndDecode(frame)
-                if data:
-                    qr_code = data
-                    break
-                if cv2.waitKey(1) & 0xFF == ord("q"):
-                    print("❌ - Pemindaian QR Code dibatalkan.\n\n")
-                    break
+                    return ""
+                frame_count += 1
+                if frame_count % _FRAME_SKIP == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        print("⚠ - Tidak dapat membaca frame dari pemindai QR.\n\n")
+                        return ""
+                    # The detector only needs luminance
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    # Locating a code is cheap; only decode when one was found
+                    found, points = detector.detect(gray)
+                    if found:
+                        data, _ = detector.decode(gray, points)
+                        if data:
+                            return data
+                    # Poll the keyboard together with the decoded frames only
+                    if cv2.waitKey(1) & 0xFF == ord("q"):
+                        print("❌ - Pemindaian QR Code dibatalkan.\n\n")
+                        return ""
+            print("⚠ - Waktu pemindaian QR Code habis.\n\n")
+            return ""
         finally:
+            # No window is ever opened, so only the camera has to be released
             cap.release()
-            cv2.destroyAllWindows()
+
+    def scan_qr(self) -> bool:
+        """
+        Scans a QR code and confirms orders with a `Pending` status.
+
+        Returns:
+            bool: True if any order was processed, so the coffee stock has changed.
+        """
+        qr_code = self.read_qr_code()
         if not qr_code:
             print("⚠ - Tidak ada QR Code yang dipindai.\n\n")
-            return
-
-        qr_data = self.db_manager.online_orders_ws.get_all_records()
-        online_order_col_indices = self.db_manager.get_column_indices(
-            self.db_manager.online_orders_ws
-        )
-        inventory_col_indices = self.db_manager.get_column_indices(
-            self.db_manager.coffee_stock_ws
-        )
-        self.coffee_list = self.db_manager.coffee_list
-        self.menu_manager.set_coffee_numbers()
+            return False
 
+        online_orders_ws = self.db_manager.online_orders_ws
+        # The queue is filled from outside this machine, so it is read fresh on
+        # every scan; the header of the same response gives the column positions
+        values = online_orders_ws.get_values(value_render_option="UNFORMATTED_VALUE")
+        header = values[0] if values else []
+        missing = [name for name in _REQUIRED_COLUMNS if name not in header]
+        if missing:
+            print(f"⚠ - Kolom {', '.join(missing)} tidak ditemukan di antrean pesanan.\n\n")
+            return False
+        width = len(header)
+        qr_pos = header.index("QR")
+        # Partition the rows of the scanned QR code by status in one pass,
+        # keeping their sheet row numbers; only matching rows become records
+        rows_by_status = defaultdict(list)
+        # Numeric QR cells are read back as integers, so the scanned code is
+        # matched in both forms with a single set lookup per row instead of
+        # converting every cell to a string
+        qr_keys = {qr_code, int(qr_code)} if qr_code.isdecimal() else {qr_code}
+        for index, values_row in enumerate(values[1:], start=2):
+            if len(values_row) <= qr_pos:
+                continue
+            if values_row[qr_pos] in qr_keys:
+                # Google Sheets trims trailing empty cells, so pad the row to the header
+                row = dict(zip(header, values_row + [""] * (width - len(values_row))))
+                rows_by_status[row["Status"]].append((index, row))
+        pending_rows = rows_by_status["Pending"]
+        # Column numbers are 1-based
+        status_col = header.index("Status") + 1
+        quantity_col = header.index("Jumlah") + 1
         order = []
+        order_index = {}
+        # Cell updates for the order queue, sent together after the loop
+        order_updates = []
         out_of_stock = False
-        is_valid = False
-        for index, row in enumerate(qr_data, start=2):
-            if str(row["QR"]) == qr_code and row["Status"] == "Pending":
-                coffee_name = row["Jenis kopi"]
-                ordered_quantity = int(row["Jumlah"])
-                if coffee_name not in self.coffee_list:
-                    print(f"ℹ - Maaf, {coffee_name} tidak tersedia di mesin ini")
-                    continue
-                coffee = self.coffee_list[coffee_name]
-                current_stock = coffee.stock
-                if current_stock <= 0:
-                    out_of_stock = True
-                    print(f"ℹ - Stok {coffee_name} habis, silahkan coba di mesin lain")
-                    continue
-                if current_stock < ordered_quantity:
-                    print(
-                        f"ℹ - Stok {coffee_name} tidak mencukupi. Tersisa {current_stock} cup."
-                    )
-                    processable_quantity = current_stock
-                else:
-                    processable_quantity = ordered_quantity
-
-                composition = CompositionData(
-                    sugar=int(row.get("Gula", 0)),
-                    creamer=int(row.get("Krimer", 0)),
-                    milk=int(row.get("Susu", 0)),
-                    chocolate=int(row.get("Cokelat", 0)),
+        is_valid = bool(rows_by_status["Selesai"])
+        for index, row in pending_rows:
+            coffee_name = row["Jenis kopi"]
+            ordered_quantity = int(row["Jumlah"])
+            if coffee_name not in self.coffee_list:
+                print(f"ℹ - Maaf, {coffee_name} tidak tersedia di mesin ini")
+                continue
+            coffee = self.coffee_list[coffee_name]
+            current_stock = coffee.stock
+            if current_stock <= 0:
+                out_of_stock = True
+                print(f"ℹ - Stok {coffee_name} habis, silahkan coba di mesin lain")
+                continue
+            if current_stock < ordered_quantity:
+                print(
+                    f"ℹ - Stok {coffee_name} tidak mencukupi. Tersisa {current_stock} cup."
                 )
-                temperature = row["Suhu"].lower()
+                processable_quantity = current_stock
+            else:
+                processable_quantity = ordered_quantity
 
-                # Add the order to the list
-                self.order_manager.add_to_order(
-                    order, coffee, temperature, composition, processable_quantity
-                )
+            get = row.get
+            composition = CompositionData(
+                int(get("Gula", 0)),
+                int(get("Krimer", 0)),
+                int(get("Susu", 0)),
+                int(get("Cokelat", 0)),
+            )
+            temperature = row["Suhu"].lower()
 
-                # Update the order status in Google Sheets
-                if processable_quantity == ordered_quantity:
-                    self.db_manager.online_orders_ws.update_cell(
-                        index, online_order_col_indices["Status"], "Selesai"
-                    )
-                    self.db_manager.online_orders_ws.update_cell(
-                        index, online_order_col_indices["Jumlah"], 0
-                    )
-                else:
-                    remaining_order = ordered_quantity - processable_quantity
-                    self.db_manager.online_orders_ws.update_cell(
-                        index, online_order_col_indices["Jumlah"], remaining_order
-                    )
+            # Take the stock out of the cache first; the synchronization thread writes it.
+            # The stock checked above may have been taken in the meantime,
+            # so the row is only processed once the reservation succeeds
+            if not self.db_manager.reserve_stock(coffee.name, processable_quantity, {}):
+                out_of_stock = True
+                print(f"ℹ - Stok {coffee_name} habis, silahkan coba di mesin lain")
+                continue
 
-                new_stock = coffee.stock - processable_quantity
-                self.db_manager.coffee_stock_ws.update_cell(
-                    coffee.row_number,
-                    inventory_col_indices["Sisa Persediaan"],
-                    new_stock,
-                )
-                coffee.stock = new_stock
+            # Add the order to the list
+            self.order_manager.add_to_order(
+                order, order_index, coffee, temperature, composition, processable_quantity
+            )
 
-            elif str(row["QR"]) == qr_code and row["Status"] == "Selesai":
-                is_valid = True
+            # Collect the order status updates for Google Sheets
+            remaining_order = ordered_quantity - processable_quantity
+            if remaining_order == 0:
+                order_updates.append({
+                    "range": rowcol_to_a1(index, status_col),
+                    "values": [["Selesai"]],
+                })
+            order_updates.append({
+                "range": rowcol_to_a1(index, quantity_col),
+                "values": [[remaining_order]],
+            })
+
+        if order_updates:
+            # Update every processed order row with a single request
+            online_orders_ws.batch_update(order_updates)
+            self.db_manager.request_sync()
+            self.menu_manager.invalidate_menu()
 
         if order:
             print(" ")
             self.order_manager.summarize_order(order)
             print("\n☕ - Terima kasih! Silakan ambil kopi Anda.\n\n")
-            for item in order:
-                # Format the composition before logging the sale
-                composition_str = self.format_composition(item.composition)
-                self.db_manager.log_sale(
+            # Log the whole order as one operation, appended with a single request
+            self.db_manager.enqueue_log_sales(
+                [
                     SalesRecord(
                         coffee_type=item.coffee.name,
                         temperature=item.temperature,
-                        composition=composition_str,  # Use the formatted string
+                        # Format the composition before logging the sale
+                        composition=self.format_composition(item.composition),
                         quantity=f"x{item.quantity}",
-                        total_price=item.coffee.price,
+                        total_price=item.coffee.price * item.quantity,
                         payment_method="Pembelian Daring Melalui Website",
                     )
-                )
+                    for item in order
+                ]
+            )
         else:
             if not out_of_stock:
                 if is_valid:
                     print("ℹ - Semua pesanan dengan QR ini sudah selesai.\n\n")
                 else:
                     print("⚠ - QR yang diberikan tidak valid.\n\n")
+        return bool(order)
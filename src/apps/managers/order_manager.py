@@ -14,12 +14,42 @@ Key functionalities include:
 - Handling order cancellations and modifications.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from apps.managers.menu_manager import MenuManager
 from apps.database.database_manager import DatabaseManager
 from apps.data_classes import CoffeeData, CompositionData, OrderItem
-from apps.utils.input_utils import input_with_timeout
+from apps.utils.input_utils import input_with_timeout, InputTimeout
+
+# Additive names, used as keys of the additive inventory
+_SUGAR = "Gula"
+_CREAMER = "Krimer"
+_MILK = "Susu"
+_CHOCOLATE = "Cokelat"
+
+# Additive names paired with the CompositionData field holding their amount,
+# in the order their stock is checked
+_ADDITIVE_FIELDS = (
+    (_SUGAR, "sugar"),
+    (_CREAMER, "creamer"),
+    (_MILK, "milk"),
+    (_CHOCOLATE, "chocolate"),
+)
+
+# Template for the two summary lines of an order item
+_SUMMARY_ITEM_FMT = (
+    "{}. {} ({}) x{} - Rp{}\n"
+    "   Gula: {} takaran, Krimer: {} takaran, Susu: {} takaran, Cokelat: {} takaran"
+)
+
+# Prompt asking for the whole composition at once, in CompositionData field order
+_COMPOSITION_PROMPT = (
+    f"> 🎨 - Atur kadar {_SUGAR},{_CREAMER},{_MILK},{_CHOCOLATE} sekaligus "
+    "(0-5 takaran, contoh: 1,0,1,0 | Enter untuk atur satu per satu | 'x' untuk batal): "
+)
+
+# Answers that end the order and move on to payment
+_NO_ANSWERS = frozenset({"n", "no", "tidak", "gak"})
 
 class OrderManager:
     """
@@ -65,11 +95,9 @@ class OrderManager:
         Returns:
             Optional[str]: 'hangat' or 'dingin', or None if canceled.
         """
+        prompt = f"🌡 - Tentukan suhu untuk {coffee_name}? (1. Hangat | 2. Dingin | 'x' untuk batal): "
         while True:
-            temp_input = input_with_timeout(
-                self.db_manager,
-                f"🌡 - Tentukan suhu untuk {coffee_name}? (1. Hangat | 2. Dingin | 'x' untuk batal): ",
-            )
+            temp_input = input_with_timeout(prompt)
             if temp_input.lower() == "x":
                 print("❌ - Membatalkan pemilihan suhu.")
                 return None
@@ -90,50 +118,99 @@ class OrderManager:
         Returns:
             Optional[int]: The amount of the additive, or None if canceled.
         """
+        prompt = f"> 🎨 - Atur kadar {additive_type} (0-5 takaran | 'x' untuk batal): "
         while True:
             # Display the available stock of the additive before asking for input
             available_stock = self.additives_list.get(additive_type, 0)
             print(f"📦 - Stok {additive_type}: {available_stock} takaran")
 
-            amount_input = input_with_timeout(
-                self.db_manager,
-                f"> 🎨 - Atur kadar {additive_type} (0-5 takaran | 'x' untuk batal): ",
-            )
-            if amount_input.lower() == "x":
+            amount_input = input_with_timeout(prompt).strip()
+            if amount_input in ("x", "X"):
                 print("❌ - Membatalkan pengaturan komposisi.")
                 return None
-            try:
-                amount = int(amount_input)
-                if 0 <= amount <= 5:
-                    # Validate that the chosen amount does not exceed the available stock
-                    if amount > available_stock:
-                        print(
-                            f"⚠ - Jumlah takaran {additive_type} melebihi stok yang tersedia ({available_stock})."
-                        )
-                        continue
-                    return amount
-                else:
-                    print("⚠ - Jumlah harus antara 0 hingga 5.")
-            except ValueError:
+            if not amount_input.isdecimal():
                 print("⚠ - Input tidak valid. Masukkan angka.")
+                continue
+            amount = int(amount_input)
+            if amount > 5:
+                print("⚠ - Jumlah harus antara 0 hingga 5.")
+                continue
+            # Validate that the chosen amount does not exceed the available stock
+            if amount > available_stock:
+                print(
+                    f"⚠ - Jumlah takaran {additive_type} melebihi stok yang tersedia ({available_stock})."
+                )
+                continue
+            return amount
+
+    def parse_composition(self, composition_input: str) -> Optional[CompositionData]:
+        """
+        Parses a composition entered as comma-separated amounts of sugar, creamer,
+        milk, and chocolate.
+
+        Every amount must be between 0 and 5 units and must not exceed the
+        available stock of its additive.
+
+        Args:
+            composition_input (str): The comma-separated additive amounts.
+
+        Returns:
+            Optional[CompositionData]: The parsed composition, or None if the input is invalid.
+        """
+        parts = [part.strip() for part in composition_input.split(",")]
+        if len(parts) != len(_ADDITIVE_FIELDS) or not all(
+            part.isdecimal() for part in parts
+        ):
+            print("⚠ - Format komposisi tidak valid.")
+            return None
+        amounts = [int(part) for part in parts]
+        for (additive, _), amount in zip(_ADDITIVE_FIELDS, amounts):
+            if amount > 5:
+                print("⚠ - Jumlah harus antara 0 hingga 5.")
+                return None
+            available_stock = self.additives_list.get(additive, 0)
+            if amount > available_stock:
+                print(
+                    f"⚠ - Jumlah takaran {additive} melebihi stok yang tersedia ({available_stock})."
+                )
+                return None
+        return CompositionData(*amounts)
 
     def select_composition(self) -> Optional[CompositionData]:
         """
         Guides the user through selecting the composition of sugar, creamer, milk, and chocolate.
 
+        The whole composition is asked for in a single prompt. If the user skips it
+        or enters an invalid composition, each additive is asked for separately.
+
         Returns:
             Optional[CompositionData]: A CompositionData object with the additive composition, or None if canceled.
         """
-        sugar = self.set_additive_amount("Gula")
+        stocks = ", ".join(
+            f"{additive}: {self.additives_list.get(additive, 0)}"
+            for additive, _ in _ADDITIVE_FIELDS
+        )
+        print(f"📦 - Stok bahan tambahan (takaran) - {stocks}")
+        composition_input = input_with_timeout(_COMPOSITION_PROMPT).strip()
+        if composition_input.lower() == "x":
+            print("❌ - Membatalkan pengaturan komposisi.")
+            return None
+        if composition_input:
+            composition = self.parse_composition(composition_input)
+            if composition is not None:
+                return composition
+            print("🔃 - Silakan atur komposisi satu per satu.")
+
+        sugar = self.set_additive_amount(_SUGAR)
         if sugar is None:
             return None
-        creamer = self.set_additive_amount("Krimer")
+        creamer = self.set_additive_amount(_CREAMER)
         if creamer is None:
             return None
-        milk = self.set_additive_amount("Susu")
+        milk = self.set_additive_amount(_MILK)
         if milk is None:
             return None
-        chocolate = self.set_additive_amount("Cokelat")
+        chocolate = self.set_additive_amount(_CHOCOLATE)
         if chocolate is None:
             return None
         return CompositionData(sugar, creamer, milk, chocolate)
@@ -147,37 +224,23 @@ class OrderManager:
         """
         while True:
             quantity_input = input_with_timeout(
-                self.db_manager,
                 "Pesan berapa kopi dengan komposisi ini? ('x' untuk batal): ",
-            )
-            if quantity_input.lower() == "x":
+            ).strip()
+            if quantity_input in ("x", "X"):
                 print("❌ - Membatalkan pemesanan.\n")
                 return None
-            try:
-                quantity = int(quantity_input)
-                if quantity > 0:
-                    return quantity
-                else:
-                    print("⚠ - Jumlah kopi harus lebih dari 0.")
-            except ValueError:
+            if not quantity_input.isdecimal():
                 print("⚠ - Input tidak valid. Masukkan angka.")
-
-    def are_compositions_equal(self, comp1: CompositionData, comp2: CompositionData) -> bool:
-        """
-        Compares two additive compositions.
-
-        Args:
-            comp1 (CompositionData): The first composition.
-            comp2 (CompositionData): The second composition.
-
-        Returns:
-            bool: True if both compositions are the same, False otherwise.
-        """
-        return comp1 == comp2
+                continue
+            quantity = int(quantity_input)
+            if quantity > 0:
+                return quantity
+            print("⚠ - Jumlah kopi harus lebih dari 0.")
 
     def add_to_order(
         self,
         order_data: List[OrderItem],
+        order_index: Dict[Tuple[str, str, CompositionData], OrderItem],
         coffee: CoffeeData,
         temperature: str,
         composition: CompositionData,
@@ -185,10 +248,15 @@ class OrderManager:
     ) -> List[OrderItem]:
         """
         Adds an order item to the order list.
-        If an item with the same composition already exists, its quantity is increased.
+        If an item with the same coffee, temperature, and composition already exists,
+        its quantity is increased, so every item of an order is unique and is logged
+        as a single sales record after payment.
 
         Args:
             order_data (List[OrderItem]): The current list of order items.
+            order_index (Dict[Tuple[str, str, CompositionData], OrderItem]): The items of
+                the order keyed by coffee name, temperature, and composition, kept
+                alongside `order_data` so existing items are found without a scan.
             coffee (CoffeeData): The CoffeeData object being ordered.
             temperature (str): The temperature of the coffee.
             composition (CompositionData): The additive composition.
@@ -197,20 +265,14 @@ class OrderManager:
         Returns:
             List[OrderItem]: The updated list of order items.
         """
-        existing = next(
-            (
-                item
-                for item in order_data
-                if item.coffee.name == coffee.name
-                and item.temperature == temperature
-                and self.are_compositions_equal(item.composition, composition)
-            ),
-            None,
-        )
+        key = (coffee.name, temperature, composition)
+        existing = order_index.get(key)
         if existing:
             existing.quantity += quantity
         else:
-            order_data.append(OrderItem(coffee, quantity, temperature, composition))
+            item = OrderItem(coffee, quantity, temperature, composition)
+            order_data.append(item)
+            order_index[key] = item
         return order_data
 
     def summarize_order(self, order: List[OrderItem]) -> int:
@@ -223,24 +285,63 @@ class OrderManager:
         Returns:
             int: The total price of the order.
         """
-        print("========== Ringkasan Pesanan ==========")
-        total_price = 0
-        for idx, item in enumerate(order, 1):
-            coffee_price = item.coffee.price * item.quantity
-            total_price += coffee_price
-            print(
-                f"{idx}. {item.coffee.name} ({item.temperature}) x{item.quantity} - Rp{coffee_price}"
+        # Build the whole summary first, so it is written with a single call
+        line_totals = [item.coffee.price * item.quantity for item in order]
+        total_price = sum(line_totals)
+
+        lines = ["========== Ringkasan Pesanan =========="]
+        for idx, (item, line_total) in enumerate(zip(order, line_totals), 1):
+            composition = item.composition
+            lines.append(
+                _SUMMARY_ITEM_FMT.format(
+                    idx,
+                    item.coffee.name,
+                    item.temperature,
+                    item.quantity,
+                    line_total,
+                    composition.sugar,
+                    composition.creamer,
+                    composition.milk,
+                    composition.chocolate,
+                )
             )
-            print(
-                f"   Gula: {item.composition.sugar} takaran, "
-                f"Krimer: {item.composition.creamer} takaran, "
-                f"Susu: {item.composition.milk} takaran, "
-                f"Cokelat: {item.composition.chocolate} takaran"
-            )
-        print(f">>> Total Harga: Rp{total_price}")
-        print("=======================================")
+        lines.append(f">>> Total Harga: Rp{total_price}")
+        lines.append("=======================================")
+        print("\n".join(lines))
         return total_price
 
+    def additive_amounts(self, composition: CompositionData, quantity: int) -> Dict[str, int]:
+        """
+        Calculates the amount of each additive needed for a number of coffees.
+
+        Args:
+            composition (CompositionData): The additive composition of one coffee.
+            quantity (int): The number of coffees.
+
+        Returns:
+            Dict[str, int]: A dictionary mapping additive names to the amount needed.
+        """
+        return {
+            additive: getattr(composition, field) * quantity
+            for additive, field in _ADDITIVE_FIELDS
+        }
+
+    def release_order(self, order: List[OrderItem]) -> None:
+        """
+        Returns the stock reserved for an order that will not be paid.
+
+        Args:
+            order (List[OrderItem]): The list of reserved order items.
+        """
+        for item in order:
+            self.db_manager.release_stock(
+                item.coffee.name,
+                item.quantity,
+                self.additive_amounts(item.composition, item.quantity),
+            )
+        if order:
+            self.menu_manager.invalidate_menu()
+
     def check_additive_stock(self, composition: CompositionData, quantity: int) -> bool:
         """
         Checks the availability of additives.
@@ -252,31 +353,11 @@ class OrderManager:
         Returns:
             bool: True if the additive stock is sufficient, False otherwise.
         """
-        needed_sugar = composition.sugar * quantity
-        needed_creamer = composition.creamer * quantity
-        needed_milk = composition.milk * quantity
-        needed_chocolate = composition.chocolate * quantity
-
-        if self.additives_list.get("Gula", 0) < needed_sugar:
-            print(
-                f"☕ - Stok Gula tidak mencukupi. Tersisa {self.additives_list.get('Gula', 0)}."
-            )
-            return False
-        if self.additives_list.get("Krimer", 0) < needed_creamer:
-            print(
-                f"☕ - Stok Krimer tidak mencukupi. Tersisa {self.additives_list.get('Krimer', 0)}."
-            )
-            return False
-        if self.additives_list.get("Susu", 0) < needed_milk:
-            print(
-                f"☕ - Stok Susu tidak mencukupi. Tersisa {self.additives_list.get('Susu', 0)}."
-            )
-            return False
-        if self.additives_list.get("Cokelat", 0) < needed_chocolate:
-            print(
-                f"☕ - Stok Cokelat tidak mencukupi. Tersisa {self.additives_list.get('Cokelat', 0)}."
-            )
-            return False
+        for additive, needed in self.additive_amounts(composition, quantity).items():
+            stock = self.additives_list.get(additive, 0)
+            if stock < needed:
+                print(f"☕ - Stok {additive} tidak mencukupi. Tersisa {stock}.")
+                return False
 
         return True
 
@@ -284,88 +365,92 @@ class OrderManager:
         """
         Handles the user's coffee selection process.
 
+        The stock of every item added to the order is reserved right away. The
+        reservation is returned if the selection is canceled or times out; otherwise
+        the caller must either keep it (order paid) or return it with `release_order`.
+
         Returns:
-            List[OrderItem]: A list of order items, or an empty list if canceled.
+            List[OrderItem]: A list of reserved order items, or an empty list if canceled.
         """
-        coffee_name_by_number = {
-            coffee.number: coffee for coffee in self.coffee_list.values() if coffee.stock > 0
-        }
+        coffee_name_by_number = self.menu_manager.coffee_by_number
         order_data: List[OrderItem] = []
+        order_index: Dict[Tuple[str, str, CompositionData], OrderItem] = {}
         order_count = 1
-        while True:
-            print(f"\n*********** Pesanan ke-{order_count}: Pilih Kopi ************")
-            self.menu_manager.display_coffee_menu()
-            choice = input_with_timeout(
-                self.db_manager, "Pilih nomor kopi ('x' untuk batal): "
-            )
-            if choice.lower() == "x":
-                print("❌ - Membatalkan proses pemesanan.\n")
-                if (len(order_data) > 0):
-                    for item in order_data:
-                        self.coffee_list[item.coffee.name].stock += item.quantity
-                        self.additives_list["Gula"] += item.composition.sugar * item.quantity
-                        self.additives_list["Krimer"] += item.composition.creamer * item.quantity
-                        self.additives_list["Susu"] += item.composition.milk * item.quantity
-                        self.additives_list["Cokelat"] += item.composition.chocolate * item.quantity
-                order_data = []
-                break
-            elif choice.isdigit():
-                choice_int = int(choice)
-                if choice_int in coffee_name_by_number:
-                    coffee = coffee_name_by_number[choice_int]
-                    print(f"\nAnda memilih {coffee.name}".upper())
-                    temperature = self.select_temperature(coffee.name)
-                    if temperature is None:
-                        continue
-                    composition = self.select_composition()
-                    if composition is None:
-                        continue
-                    quantity = self.order_quantity()
-                    if quantity is None:
-                        continue
-
-                    # Check coffee stock
-                    if coffee.stock < quantity:
-                        print(
-                            f"☕ - Stok {coffee.name} tidak mencukupi. Tersisa {coffee.stock}."
+        try:
+            while True:
+                print(f"\n*********** Pesanan ke-{order_count}: Pilih Kopi ************")
+                self.menu_manager.display_coffee_menu()
+                choice = input_with_timeout(
+                    "Pilih nomor kopi ('x' untuk batal): "
+                )
+                if choice.lower() == "x":
+                    print("❌ - Membatalkan proses pemesanan.\n")
+                    self.release_order(order_data)
+                    order_data = []
+                    break
+                elif choice.isdigit():
+                    coffee = coffee_name_by_number.get(int(choice))
+                    # A coffee sold out by this order is hidden from the menu but
+                    # keeps its number until the menu is renumbered
+                    if coffee is not None and coffee.stock > 0:
+                        print(f"\nAnda memilih {coffee.name}".upper())
+                        temperature = self.select_temperature(coffee.name)
+                        if temperature is None:
+                            continue
+                        composition = self.select_composition()
+                        if composition is None:
+                            continue
+                        quantity = self.order_quantity()
+                        if quantity is None:
+                            continue
+
+                        # Check coffee stock
+                        if coffee.stock < quantity:
+                            print(
+                                f"☕ - Stok {coffee.name} tidak mencukupi. Tersisa {coffee.stock}."
+                            )
+                            print(
+                                "🔃 - Silakan ulangi pemesanan dengan jumlah yang tersedia.\n"
+                            )
+                            continue
+
+                        # Check additive stock
+                        if not self.check_additive_stock(composition, quantity):
+                            print(
+                                "🔃 - Silakan ulangi pemesanan dengan komposisi yang tersedia.\n"
+                            )
+                            continue
+
+                        # Reserve the stock so it is already taken once the order is paid
+                        if not self.db_manager.reserve_stock(
+                            coffee.name, quantity, self.additive_amounts(composition, quantity)
+                        ):
+                            print("🔃 - Silakan ulangi pemesanan.\n")
+                            continue
+                        # The displayed stock has changed
+                        self.menu_manager.invalidate_menu()
+
+                        # If stock is sufficient, add to the order data
+                        order_data = self.add_to_order(
+                            order_data, order_index, coffee, temperature, composition, quantity
                         )
-                        print(
-                            "🔃 - Silakan ulangi pemesanan dengan jumlah yang tersedia.\n"
-                        )
-                        continue
 
-                    # Check additive stock
-                    if not self.check_additive_stock(composition, quantity):
-                        print(
-                            "🔃 - Silakan ulangi pemesanan dengan komposisi yang tersedia.\n"
-                        )
-                        continue
+                        print("\nApakah Anda ingin memesan kopi lagi?")
+                        more = input_with_timeout(
+                            "Ketik 'y' untuk Ya atau 'n' untuk Tidak: "
+                        ).lower()
 
-                    # If stock is sufficient, add to the order data
-                    order_data = self.add_to_order(
-                        order_data, coffee, temperature, composition, quantity
-                    )
-
-                    print("\nApakah Anda ingin memesan kopi lagi?")
-                    more = input_with_timeout(
-                        self.db_manager, "Ketik 'y' untuk Ya atau 'n' untuk Tidak: "
-                    ).lower()
-
-                    if more in ["n", "no", "tidak", "gak"]:
-                        print("\nMelanjutkan ke proses pembayaran...")
-                        break
+                        if more in _NO_ANSWERS:
+                            print("\nMelanjutkan ke proses pembayaran...")
+                            break
+                        else:
+                            order_count += 1
                     else:
-                        order_count += 1
-            
-                    # Update stock after all orders are confirmed
-                    for item in order_data:
-                        self.coffee_list[item.coffee.name].stock -= item.quantity
-                        self.additives_list["Gula"] -= item.composition.sugar * item.quantity
-                        self.additives_list["Krimer"] -= item.composition.creamer * item.quantity
-                        self.additives_list["Susu"] -= item.composition.milk * item.quantity
-                        self.additives_list["Cokelat"] -= item.composition.chocolate * item.quantity
+                        print("⚠ - Pilihan tidak tersedia. Silakan pilih lagi.")
                 else:
-                    print("⚠ - Pilihan tidak tersedia. Silakan pilih lagi.")
-            else:
-                print("⚠ - Input tidak valid. Silakan masukkan angka atau 'x'.")
+                    print("⚠ - Input tidak valid. Silakan masukkan angka atau 'x'.")
+        except InputTimeout:
+            # Return the stock reserved so far before going back to the main menu
+            self.release_order(order_data)
+            raise
         return order_data
@@ -6,28 +6,69 @@ This class manages different payment methods, including:
 - **Cash Payments**: It guides the user through the process of inserting cash,
   calculating the total paid, and providing change.
 - **QRIS Payments**: It generates a unique QR code for each transaction,
-  displays it to the user, and then polls the database to check for payment
-  confirmation from the web service. It also handles payment timeouts.
+  displays it to the user, and then waits for the web service to signal the
+  payment confirmation. It also handles payment timeouts.
 
 The manager interacts with the `DatabaseManager` to record transaction details
 and update payment statuses.
 """
 
 from typing import Tuple, Optional
+import io
+import sys
 import socket
+import threading
 import time
-import random
-import string
-from datetime import datetime
-
-import qrcode
-import qrcode.constants
+import secrets
 
 from apps.database.database_manager import DatabaseManager
 from apps.data_classes import QRCodeData
 from apps.utils.input_utils import input_with_timeout
 from credentials.config import Configuration
 
+# Payment method list, printed together with the payment header and total
+_PAYMENT_METHODS = (
+    "=== Metode Pembayaran Tersedia ===\n"
+    "1. Tunai\n"
+    "2. QRIS\n"
+    "=================================="
+)
+
+# QR code version fitted for each payload length
+_QR_VERSIONS = {}
+
+def _render_qr_ascii(data: str) -> str:
+    """
+    Builds a QR code and renders it as ASCII.
+
+    Every payment URL has the same length, so the smallest fitting version is
+    searched for only once and then reused with `fit=False`, which also lets
+    qrcode reuse its cached blank modules for that version.
+
+    Args:
+        data (str): The data to be encoded into the QR code.
+
+    Returns:
+        str: The QR code drawn with ASCII characters.
+    """
+    # qrcode is only needed for QRIS payments, so it is imported on first use
+    import qrcode
+    import qrcode.constants
+
+    version = _QR_VERSIONS.get(len(data))
+    qr = qrcode.QRCode(
+        version=version or 1,  # QR Code size
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=1,  # Only used for images; the ASCII output draws one character per module
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=version is None)
+    _QR_VERSIONS[len(data)] = qr.version
+    out = io.StringIO()
+    qr.print_ascii(out=out, tty=False)
+    return out.getvalue()
+
 class PaymentManager:
     """Manages the payment process."""
 
@@ -39,15 +80,9 @@ class PaymentManager:
             db_manager (DatabaseManager): The DatabaseManager object to interact with the database.
         """
         self.db_manager = db_manager
-
-    def display_payment_methods(self) -> None:
-        """
-        Displays the available payment methods to the user.
-        """
-        print("=== Metode Pembayaran Tersedia ===")
-        print("1. Tunai")
-        print("2. QRIS")
-        print("==================================")
+        # Resolve the local address once, so no checkout waits on the resolver
+        local_ip = socket.gethostbyname(socket.gethostname())
+        self.qr_base_url = f"http://{local_ip}:{Configuration.PORT}/search?ref_id="
 
     def process_cash_payment(self, total_price: int) -> Tuple[bool, str]:
         """
@@ -65,37 +100,42 @@ class PaymentManager:
         total_paid = 0
         while total_paid < total_price:
             money_input = input_with_timeout(
-                self.db_manager, f"Masukkan uang pembayaran ('x' untuk batal): Rp"
+                f"Masukkan uang pembayaran ('x' untuk batal): Rp"
             )
+            money_input = money_input.strip()
             if money_input.lower() == "x":
                 print("❌ - Membatalkan pembayaran tunai.\n")
                 return False, "Tunai"
-            try:
-                amount = int(money_input)
-                if amount <= 0:
-                    print(
-                        "⚠ - Jumlah uang harus lebih besar dari Rp0. Silakan masukkan kembali."
-                    )
-                    continue
-                total_paid += amount
-                if total_paid >= total_price:
-                    change = total_paid - total_price
-                    print(
-                        f"\n✅ - Pembayaran berhasil. Kembalian Anda: Rp{change}\n"
-                    )
-                    return True, "Tunai"
-                else:
-                    shortage = total_price - total_paid
-                    print(
-                        f"ℹ - Uang kurang. Anda masih kurang Rp{shortage}. Silakan masukkan kembali."
-                    )
-            except ValueError:
+            if not money_input.isdecimal():
                 print("⚠ - Input tidak valid. Silakan masukkan angka.")
+                continue
+            amount = int(money_input)
+            if amount <= 0:
+                print(
+                    "⚠ - Jumlah uang harus lebih besar dari Rp0. Silakan masukkan kembali."
+                )
+                continue
+            total_paid += amount
+            if total_paid >= total_price:
+                change = total_paid - total_price
+                print(
+                    f"\n✅ - Pembayaran berhasil. Kembalian Anda: Rp{change}\n"
+                )
+                return True, "Tunai"
+            else:
+                shortage = total_price - total_paid
+                print(
+                    f"ℹ - Uang kurang. Anda masih kurang Rp{shortage}. Silakan masukkan kembali."
+                )
         return False, "Tunai"
 
     def generate_random_string(self, length: int = 10) -> str:
         """
-        Generates a random string of a specified length.
+        Generates a random string of digits of a specified length.
+
+        The digits come from a single random number, zero-padded to the length.
+        The reference ID confirms a payment, so it is drawn from the `secrets`
+        module instead of the predictable `random` generator.
 
         Args:
             length (int): The desired length of the string (default: 10).
@@ -103,7 +143,7 @@ class PaymentManager:
         Returns:
             str: A random string of the specified length.
         """
-        return "".join(random.choices(string.digits, k=length))
+        return f"{secrets.randbelow(10 ** length):0{length}d}"
 
     def generate_qr(self, data: str) -> None:
         """
@@ -112,22 +152,15 @@ class PaymentManager:
         Args:
             data (str): The data to be encoded into the QR code.
         """
-        qr = qrcode.QRCode(
-            version=1,  # QR Code size
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        qr.print_ascii()
+        sys.stdout.write(_render_qr_ascii(data))
 
     def process_qris_payment(self, total_price: int) -> Tuple[bool, str]:
         """
         Handles QRIS payment by printing a QR code in the terminal.
 
         This method generates a unique reference ID, creates a URL for the web service,
-        displays it as a QR code, and polls for payment status updates.
+        displays it as a QR code, and waits until the web service signals a status
+        update or the payment times out.
 
         Args:
             total_price (int): The total price to be paid.
@@ -141,43 +174,34 @@ class PaymentManager:
 
         # Generate a unique Reference ID
         ref_id = self.generate_random_string()
-        local_ip = socket.gethostbyname(socket.gethostname())
-        qr_data_url = f"http://{local_ip}:{Configuration.PORT}/search?ref_id={ref_id}"
+        qr_data_url = self.qr_base_url + ref_id
+
+        # Register the event the web service sets once the payment is confirmed
+        status_event = threading.Event()
+        self.db_manager.qr_events[ref_id] = status_event
 
         # Create the QR code
         self.generate_qr(qr_data_url)
 
-        # Add QR data to the worksheet
-        self.db_manager.qr_code_ws.append_row(
-            [
-                ref_id,
-                total_price,
-                "Pembayaran QRIS",
-                datetime.now().strftime("%d-%m-%Y, %H:%M:%S"),
-                "Pending",
-            ]
-        )
-        # Add QR data to the local cache
-        with self.db_manager.lock:
-            self.db_manager.qr_code_list.append(
-                QRCodeData(
-                    ref_id=ref_id,
-                    total_price=total_price,
-                    payment_method="Pembayaran QRIS",
-                    timestamp=datetime.now().strftime("%d-%m-%Y, %H:%M:%S"),
-                    status="Pending",
-                    row_number=len(self.db_manager.qr_code_list) + 2,
-                )
+        # Add QR data to the local cache; it is appended to the worksheet
+        # by the synchronization thread
+        self.db_manager.add_qr_code(
+            QRCodeData(
+                ref_id=ref_id,
+                total_price=total_price,
+                payment_method="Pembayaran QRIS",
+                timestamp=time.strftime("%d-%m-%Y, %H:%M:%S"),
+                status="Pending",
             )
+        )
 
         # Wait for payment to complete or timeout
-        start_time = time.time()
-        while True:
-            time.sleep(5)  # Wait 5 seconds before checking status
-
-            # Check if the time has exceeded the timeout
-            if time.time() - start_time > Configuration.QRIS_TIMEOUT:
-                self.db_manager.enqueue_update_qr_status(ref_id, "Expired")
+        try:
+            # Expiring fails if the payment was confirmed right after the timeout,
+            # in which case it is treated as paid below
+            if not status_event.wait(
+                timeout=Configuration.QRIS_TIMEOUT
+            ) and self.db_manager.expire_payment(ref_id):
                 print("⚠ - Pembayaran QRIS telah kadaluarsa.\n")
                 return False, "QRIS"
 
@@ -186,9 +210,10 @@ class PaymentManager:
             if status == "Selesai":
                 print("✅ - Pembayaran QRIS berhasil.\n")
                 return True, "QRIS"
-            elif status == "Expired":
-                print("⚠ - Pembayaran QRIS kadaluarsa.\n")
-                return False, "QRIS"
+            print("⚠ - Pembayaran QRIS kadaluarsa.\n")
+            return False, "QRIS"
+        finally:
+            self.db_manager.qr_events.pop(ref_id, None)
 
     def check_qr_status(self, ref_id: str) -> str:
         """
@@ -200,11 +225,8 @@ class PaymentManager:
         Returns:
             str: The status of the QR code.
         """
-        with self.db_manager.lock:
-            for data in self.db_manager.qr_code_list:
-                if data.ref_id == ref_id:
-                    return data.status
-        return "Pending"
+        data = self.db_manager.get_qr_code(ref_id)
+        return data.status if data else "Pending"
 
     def process_payment(self, total_price: int) -> Tuple[bool, Optional[str]]:
         """
@@ -216,12 +238,13 @@ class PaymentManager:
         Returns:
             Tuple[bool, Optional[str]]: A tuple containing the payment status (bool) and the payment method (str) if successful, or None if canceled.
         """
-        print("\n*********** Pilih Metode Pembayaran ************")
-        self.display_payment_methods()
-        print(f">>> Total yang harus dibayar: Rp{total_price}")
+        print(
+            "\n*********** Pilih Metode Pembayaran ************\n"
+            f"{_PAYMENT_METHODS}\n"
+            f">>> Total yang harus dibayar: Rp{total_price}"
+        )
         while True:
             payment_method_input = input_with_timeout(
-                self.db_manager,
                 "Pilih metode pembayaran (1: Tunai | 2: QRIS | 'x' untuk batal): ",
             )
             if payment_method_input.lower() == "x":
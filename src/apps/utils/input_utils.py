@@ -5,31 +5,83 @@ indefinitely for user input, allowing it to reset to the main menu after a
 period of inactivity.
 """
 
+from functools import lru_cache
+import selectors
+import sys
+
 from inputimeout import inputimeout, TimeoutOccurred
 from credentials.config import Configuration
-from apps.database.database_manager import DatabaseManager
 
-def input_with_timeout(db_manager: DatabaseManager, text: str, time_limit: int = Configuration.TIMEOUT_DURATION) -> str:
+try:
+    import termios
+except ImportError:
+    # Windows consoles cannot be waited on with a selector, so inputimeout
+    # polls them instead
+    termios = None
+
+class InputTimeout(Exception):
+    """Raised when the user does not provide input within the time limit."""
+
+@lru_cache(maxsize=None)
+def _stdin_selector() -> selectors.BaseSelector:
+    """
+    Creates the selector that waits for the standard input, registered once and
+    reused by every prompt instead of being set up again for each one.
+
+    Returns:
+        selectors.BaseSelector: A selector with the standard input registered for reading.
+    """
+    selector = selectors.DefaultSelector()
+    selector.register(sys.stdin, selectors.EVENT_READ)
+    return selector
+
+def _read_line(text: str, time_limit: int) -> str:
+    """
+    Displays a prompt and reads a line from the standard input with a time limit.
+
+    Args:
+        text (str): The text to be displayed as the input prompt.
+        time_limit (int): The time limit in seconds.
+
+    Returns:
+        str: The line read, without its line ending.
+
+    Raises:
+        TimeoutOccurred: If no input was provided within the time limit.
+    """
+    sys.stdout.write(text)
+    sys.stdout.flush()
+    if not _stdin_selector().select(time_limit):
+        sys.stdout.write("\n")
+        # Discard a partially typed line, so it is not read by the next prompt
+        termios.tcflush(sys.stdin, termios.TCIFLUSH)
+        raise TimeoutOccurred
+    return sys.stdin.readline().rstrip("\n")
+
+def input_with_timeout(text: str, time_limit: int = Configuration.TIMEOUT_DURATION) -> str:
     """
     Takes input from the user with a time limit.
 
     If the user does not provide input within the specified time limit, it catches
-    the `TimeoutOccurred` exception, prints a message, and restarts the main
-    simulation loop of the coffee machine.
+    the `TimeoutOccurred` exception, prints a message, and raises `InputTimeout`,
+    which the main simulation loop catches to return to the main menu.
 
     Args:
-        db_manager (DatabaseManager): The database manager instance, needed to restart the simulation.
         text (str): The text to be displayed as the input prompt.
         time_limit (int): The time limit in seconds (default: TIMEOUT_DURATION from Configuration).
 
     Returns:
-        str: The user's input, or it triggers a simulation restart on timeout.
+        str: The user's input.
+
+    Raises:
+        InputTimeout: If no input was provided within the time limit.
     """
     try:
-        return inputimeout(prompt=text, timeout=time_limit)
+        if termios is None:
+            return inputimeout(prompt=text, timeout=time_limit)
+        return _read_line(text, time_limit)
     except TimeoutOccurred:
         print(
             "\n⏳ - Waktu habis! Tidak ada aktivitas selama 1 menit. Kembali ke menu utama!.\n"
         )
-        from apps.coffee_machine.coffee_machine import CoffeeMachine
-        CoffeeMachine(db_manager).simulation()
+        raise InputTimeout from None
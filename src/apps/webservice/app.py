@@ -15,13 +15,32 @@ Key components:
 """
 
 from typing import Optional
-import os
+from pathlib import Path
+import hashlib
 import logging
+import threading
 
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, Response, render_template, request, redirect, url_for
+from jinja2 import FileSystemBytecodeCache
+from waitress import create_server
 
 from apps.database.database_manager import DatabaseManager
-from apps.data_classes import QRCodeData
+
+# Template directory, resolved from this file so it does not depend on the
+# directory the program is launched from
+_TEMPLATE_DIR = Path(__file__).resolve().parents[2] / "templates"
+
+# Every template served by the application, compiled once at startup
+_TEMPLATES = ("loading.html", "payment_success.html", "payment_failed.html", "404.html")
+
+# Swaps the thousands separator for the Indonesian one in formatted amounts
+_RUPIAH_TRANS = str.maketrans(",", ".")
+
+# Pages without any template variables, rendered once when the application is created
+_STATIC_PAGES = ("loading.html", "payment_failed.html", "404.html")
+
+# How long browsers and proxies may reuse a static page, in seconds
+_STATIC_MAX_AGE = 60
 
 class WebApplication:
     """A web application for handling QR payment confirmations."""
@@ -35,15 +54,39 @@ class WebApplication:
         """
         self.db_manager = db_manager
 
-        self.app = Flask(
-            __name__, template_folder=os.path.join(os.getcwd(), "templates")
-        )
+        self.app = Flask(__name__, template_folder=str(_TEMPLATE_DIR))
+        # Templates do not change while the program runs, so never check them for updates.
+        self.app.config["TEMPLATES_AUTO_RELOAD"] = False
+        self.app.jinja_env.auto_reload = False
+        # Keep compiled templates in a per-user temporary directory, so restarts skip
+        # parsing them again. Without a usable directory they are compiled in memory.
+        try:
+            self.app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+        except (OSError, RuntimeError):
+            print("⚠ - Cache template tidak dapat dibuat. Template dikompilasi ulang setiap kali program dijalankan.")
         # Disable Flask's default logger and Werkzeug's logger to keep the console clean.
         logger = self.app.logger
         logger.disabled = True
         log = logging.getLogger("werkzeug")
         log.disabled = True
 
+        # Register a template filter to format numbers as currency.
+        @self.app.template_filter("rupiah")
+        def format_rupiah(value):
+            """Jinja2 filter for currency formatting."""
+            return format(value, ",.0f").translate(_RUPIAH_TRANS)
+
+        # Compile every template now, so the first request does not pay for it.
+        for name in _TEMPLATES:
+            self.app.jinja_env.get_template(name)
+
+        # Render the static pages once instead of on every request, keeping the
+        # encoded body together with its ETag.
+        self.static_pages = {}
+        for name in _STATIC_PAGES:
+            body = self.app.jinja_env.get_template(name).render().encode("utf-8")
+            self.static_pages[name] = (body, hashlib.md5(body).hexdigest())
+
         # Set up the application routes.
         self.setup_routes()
 
@@ -55,22 +98,21 @@ class WebApplication:
         @self.app.route("/search")
         def search():
             """Renders the loading page while the payment is being processed."""
-            return render_template("loading.html")
+            return self.static_response("loading.html")
 
         @self.app.route("/process_search")
         def process_search():
             """Processes the payment search and redirects to success or failure."""
             ref_id = request.args.get("ref_id")
-            payment_data = self.get_data(self.db_manager, ref_id)
-            if payment_data and payment_data.status == "Pending":
-                self.update_status(self.db_manager, ref_id, "Selesai")
+            payment_data = self.db_manager.confirm_payment(ref_id)
+            if payment_data:
                 return render_template(
                     "payment_success.html",
                     ref_id=ref_id,
                     data={
-                        "total_harga": payment_data.total_harga,
+                        "total_harga": payment_data.total_price,
                         "timestamp": payment_data.timestamp,
-                        "metode_pembayaran": payment_data.metode_pembayaran,
+                        "metode_pembayaran": payment_data.payment_method,
                     },
                 )
             else:
@@ -80,16 +122,15 @@ class WebApplication:
         def success():
             """Displays the payment success page."""
             ref_id = request.args.get("ref_id")
-            payment_data = self.get_data(self.db_manager, ref_id)
-            if payment_data and payment_data.status == "Pending":
-                self.update_status(self.db_manager, ref_id, "Selesai")
+            payment_data = self.db_manager.confirm_payment(ref_id)
+            if payment_data:
                 return render_template(
                     "payment_success.html",
                     ref_id=ref_id,
                     data={
-                        "total_harga": payment_data.total_harga,
+                        "total_harga": payment_data.total_price,
                         "timestamp": payment_data.timestamp,
-                        "metode_pembayaran": payment_data.metode_pembayaran,
+                        "metode_pembayaran": payment_data.payment_method,
                     },
                 )
             else:
@@ -98,70 +139,47 @@ class WebApplication:
         @self.app.route("/failure")
         def failure():
             """Displays the payment failure page."""
-            return render_template("payment_failed.html")
+            return self.static_response("payment_failed.html")
 
         # Handler for page not found (404) errors.
         @self.app.errorhandler(404)
         def page_not_found(e):
             """Renders the custom 404 error page."""
-            return render_template("404.html"), 404
+            # Error pages are sent without validators, so they are never cached
+            # or answered with 304
+            body, _ = self.static_pages["404.html"]
+            return Response(body, status=404, mimetype="text/html")
 
-    def get_data(
-        self, db_manager: DatabaseManager, ref_id: str
-    ) -> Optional[QRCodeData]:
+    def static_response(self, name: str) -> Response:
         """
-        Retrieves payment data based on the Reference ID from the cache.
+        Builds a cacheable response for a pre-rendered static page.
 
         Args:
-            db_manager (DatabaseManager): The DatabaseManager object.
-            ref_id (str): The Reference ID of the payment to retrieve.
+            name (str): The template name of the page.
 
         Returns:
-            Optional[QRCodeData]: A QRCodeData object containing payment data, or None if not found.
+            Response: The page response, answering 304 if the client's copy is current.
         """
-        with db_manager.lock:
-            for data in db_manager.qr_code_list:
-                if data.ref_id == ref_id:
-                    return data
-        return None
-
-    def update_status(
-        self, db_manager: DatabaseManager, ref_id: str, new_status: str
-    ) -> bool:
+        body, etag = self.static_pages[name]
+        response = Response(body, mimetype="text/html")
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = _STATIC_MAX_AGE
+        return response.make_conditional(request)
+
+    def run(self, host: str, port: int, ready_event: Optional[threading.Event] = None):
         """
-        Updates the payment status in the local cache and enqueues it for the database.
+        Runs the Flask web application on the waitress WSGI server.
 
-        Args:
-            db_manager (DatabaseManager): The DatabaseManager object.
-            ref_id (str): The Reference ID of the payment to update.
-            new_status (str): The new status for the payment.
-
-        Returns:
-            bool: True if the status was updated successfully, False otherwise.
-        """
-        with db_manager.lock:
-            for qr in db_manager.qr_code_list:
-                if qr.ref_id == ref_id:
-                    qr.status = new_status
-                    db_manager.enqueue_update_qr_status(ref_id, new_status)
-                    return True
-        return False
-
-    def run(self, host: str, port: int):
-        """
-        Runs the Flask web application.
+        The server socket is bound and listening once the server is created,
+        so `ready_event` is set right before requests start being served.
 
         Args:
             host (str): The host to run the web application on.
             port (int): The port to run the web application on.
+            ready_event (Optional[threading.Event]): Set once the server accepts connections.
         """
-
-        # Register a template filter to format numbers as currency.
-        @self.app.template_filter("rupiah")
-        def format_rupiah(value):
-            """Jinja2 filter for currency formatting."""
-            return f"{value:,.0f}".replace(",", ".")
-
-        self.app.run(
-            host=host, port=port, debug=False, threaded=True, use_reloader=False
-        )
+        server = create_server(self.app, host=host, port=port, threads=8)
+        if ready_event is not None:
+            ready_event.set()
+        server.run()
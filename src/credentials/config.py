@@ -14,6 +14,7 @@ Key configurations managed here include:
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -30,19 +31,16 @@ from dotenv import load_dotenv
 # This is done to maintain the security and privacy of sensitive information.
 # Using a .env file also simplifies configuration management.
 
-ENV_FILE = Path(
-    os.path.join(
-        os.getcwd(),
-        "credentials",
-        ".env",
-    )
-)
+# Directory of this file, resolved once so the paths below do not depend on
+# the directory the program is launched from.
+CREDENTIALS_DIR = Path(__file__).resolve().parent
+
+ENV_FILE = CREDENTIALS_DIR / ".env"
 
 if ENV_FILE.exists():
     load_dotenv(dotenv_path=ENV_FILE)
 else:
     print(f"File {ENV_FILE.name} tidak ditemukan. Pastikan file .env ada di direktori yang benar.")
-    import sys
     sys.exit(1)
 
 # =============================================================================================================
@@ -51,10 +49,8 @@ class Configuration:
     """Global configuration for the coffee machine application."""
 
     # Google service account credentials file
-    SERVICE_ACCOUNT_FILE = os.path.join(
-        os.getcwd(),
-        "credentials",
-        os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json"),
+    SERVICE_ACCOUNT_FILE = str(
+        CREDENTIALS_DIR / os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
     )
 
     # Google Sheets ID
@@ -69,14 +65,14 @@ class Configuration:
     # Port for the Flask web service
     PORT = 5000
 
-    # Host for checking connection (to indicate that the web server is running)
-    CHECK_HOST = "127.0.0.1"  # DO NOT CHANGE
-
     # Timeout duration for input (in seconds)
     TIMEOUT_DURATION = 60
 
     # Periodic synchronization interval to Google Sheets (in seconds)
     SYNC_INTERVAL = 300  # 5 minutes
 
+    # Window for batching queued operations after the first one arrives (in seconds)
+    SYNC_BATCH_WINDOW = 2
+
     # QRIS payment timeout (in seconds)
     QRIS_TIMEOUT = 300  # 5 minutes